@@ -0,0 +1,169 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+from comparison import comparison_cache, load_all_counties
+from healthcare import DERIVED_DIR
+from variables_and_helper_methods import (INTEREST_RATE_ANNUAL, DOWN_PAYMENT, MONTHS, annuity_factor,
+                                          monthly_mortgage)
+
+# =============================================================================
+# Affordability Surface
+# =============================================================================
+# Combined expenses as a share of salary over every combination of mortgage rate x down payment
+# x term x salary, for every (county, date) row of the batch frame. Only the mortgage depends on
+# the assumptions, so the cube is one broadcast expression: annuity factors (rate x term), times
+# the financed share of each listing (row x down payment), plus the row's other expenses, divided
+# by the salary axis. It is stored as float32 in data/derived/ with a JSON index of its axes and
+# the data token it was built from, and memory-mapped on load, so the what-if view only slices.
+
+# Bump when the county frames or the cube layout change so stored cubes are rebuilt
+CUBE_SCHEMA = 2
+CUBE_FILE = "affordability_cube.npy"
+INDEX_FILE = "affordability_index.json"
+
+# Grid axes; the dashboard's default assumptions are always on the grid
+RATES = np.union1d(np.round(np.arange(0.03, 0.0901, 0.005), 4), [INTEREST_RATE_ANNUAL])
+DOWN_PAYMENTS = np.array([0.035, 0.05, 0.10, 0.15, 0.20, 0.25, 0.30, 0.40])
+TERMS = np.array([15, 20, 30])
+SALARIES = np.arange(35000, 300001, 5000, dtype=float)
+
+AXES = ["row", "rate", "down_payment", "term", "salary"]
+
+
+def build_cube(df, rates=RATES, down_payments=DOWN_PAYMENTS, terms=TERMS, salaries=SALARIES):
+    # df: the long-format batch frame. Returns a (rows x rates x down payments x terms x salaries)
+    # float32 array of combined annual expenses / salary.
+    listing = df["listing_price"].to_numpy(dtype=float)
+    other = df[["annual_gas", "annual_elec", "annual_healthcare"]].to_numpy(dtype=float).sum(axis=1)
+
+    annuity = annuity_factor(np.asarray(rates)[:, None] / 12, np.asarray(terms)[None, :] * 12)  # rate x term
+    mortgage = monthly_mortgage(
+        listing[:, None, None, None],
+        annuity=annuity[None, :, None, :],
+        down_payment=np.asarray(down_payments)[None, None, :, None]
+    ) * 12
+    combined = (mortgage + other[:, None, None, None]).astype(np.float32)
+    return combined[..., None] / np.asarray(salaries, dtype=np.float32)
+
+
+class AffordabilityCube:
+
+    def __init__(self, values, index):
+        self.values = values
+        self.index = index
+        self.rates = np.array(index["rate"])
+        self.down_payments = np.array(index["down_payment"])
+        self.terms = np.array(index["term"])
+        self.salaries = np.array(index["salary"])
+        self.dates = np.array(index["dates"], dtype="datetime64[D]")
+
+    def rows(self, county):
+        start, stop = self.index["counties"][county]
+        return slice(start, stop)
+
+    def county_dates(self, county):
+        return self.dates[self.rows(county)]
+
+    @staticmethod
+    def nearest(axis, value):
+        return int(np.abs(axis - value).argmin())
+
+    def row_for(self, county, year=None):
+        # Last row of the county in the given year (or its latest row)
+        rows = self.rows(county)
+        if year is None:
+            return rows.stop - 1
+        years = self.dates[rows].astype("datetime64[Y]").astype(int) + 1970
+        in_year = np.nonzero(years <= year)[0]
+        return rows.start + (int(in_year[-1]) if len(in_year) else 0)
+
+    def surface(self, county, salary, term, year=None):
+        # rates x down payments slice for one salary/term/date
+        row = self.row_for(county, year)
+        return np.asarray(self.values[row, :, :, self.nearest(self.terms, term), self.nearest(self.salaries, salary)])
+
+    def share(self, county, salary, rate=INTEREST_RATE_ANNUAL, down_payment=DOWN_PAYMENT, term=MONTHS // 12,
+              year=None):
+        row = self.row_for(county, year)
+        return float(self.values[row, self.nearest(self.rates, rate), self.nearest(self.down_payments, down_payment),
+                                 self.nearest(self.terms, term), self.nearest(self.salaries, salary)])
+
+    def series(self, county, salary, rate=INTEREST_RATE_ANNUAL, down_payment=DOWN_PAYMENT, term=MONTHS // 12):
+        # Share over every date of the county for one slider combination
+        return np.asarray(self.values[self.rows(county), self.nearest(self.rates, rate),
+                                      self.nearest(self.down_payments, down_payment),
+                                      self.nearest(self.terms, term), self.nearest(self.salaries, salary)])
+
+
+def _make_index(df, token):
+    counties = {}
+    county_values = df["county"].to_numpy()
+    for county in dict.fromkeys(county_values):
+        rows = np.nonzero(county_values == county)[0]
+        counties[county] = [int(rows[0]), int(rows[-1]) + 1]
+    return {
+        "schema": CUBE_SCHEMA,
+        "axes": AXES,
+        "token": token,
+        "counties": counties,
+        "dates": df["observation_date"].dt.strftime("%Y-%m-%d").tolist(),
+        "rate": RATES.tolist(),
+        "down_payment": DOWN_PAYMENTS.tolist(),
+        "term": TERMS.tolist(),
+        "salary": SALARIES.tolist()
+    }
+
+
+def _axes_match(index):
+    return (index.get("rate") == RATES.tolist() and index.get("down_payment") == DOWN_PAYMENTS.tolist()
+            and index.get("term") == TERMS.tolist() and index.get("salary") == SALARIES.tolist())
+
+
+def _read_stored(token, derived_dir):
+    try:
+        with open(os.path.join(derived_dir, INDEX_FILE)) as f:
+            index = json.load(f)
+        if index.get("schema") != CUBE_SCHEMA or index.get("token") != token or not _axes_match(index):
+            return None
+        return AffordabilityCube(np.load(os.path.join(derived_dir, CUBE_FILE), mmap_mode="r"), index)
+    except (OSError, ValueError):
+        return None
+
+
+def _store(cube, derived_dir):
+    os.makedirs(derived_dir, exist_ok=True)
+    cube_path = os.path.join(derived_dir, CUBE_FILE)
+    index_path = os.path.join(derived_dir, INDEX_FILE)
+    # Index last, so a reader never pairs a new index with an old cube
+    with open(cube_path + ".tmp", "wb") as f:
+        np.save(f, cube.values)
+    os.replace(cube_path + ".tmp", cube_path)
+    with open(index_path + ".tmp", "w") as f:
+        json.dump(cube.index, f)
+    os.replace(index_path + ".tmp", index_path)
+
+
+_lock = threading.Lock()
+_current = None
+
+
+def load_cube(derived_dir=DERIVED_DIR):
+    # The cube for the current data: in memory, then data/derived/, then built and stored
+    global _current
+    token = comparison_cache.data_token("all")
+    with _lock:
+        if _current is not None and _current.index["token"] == token:
+            return _current
+        cube = _read_stored(token, derived_dir)
+        if cube is None:
+            df = load_all_counties()
+            cube = AffordabilityCube(build_cube(df), _make_index(df, token))
+            try:
+                _store(cube, derived_dir)
+            except OSError:
+                pass  # read-only deployments keep the in-memory cube
+        _current = cube
+        return cube
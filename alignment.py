@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+# =============================================================================
+# As-of Time Alignment
+# =============================================================================
+# The county series come at different frequencies (annual income dated Jan 1, monthly listings,
+# electricity and gas, daily healthcare), so exact-date inner joins keep only the few dates that
+# all of them share. Instead every series is aligned onto one sorted target index (monthly by
+# default) with as-of semantics: each target date takes the latest observation on or before it,
+# as long as that observation is no older than the series' staleness limit. A row is kept when
+# every series has a fresh value. Each series is a single searchsorted over its own dates, and
+# the output frame is assembled once at the end instead of after every merge.
+
+FREQUENCIES = {"daily": "D", "monthly": "MS", "quarterly": "QS", "annual": "YS"}
+
+
+def target_index(frames, freq="MS", since=None, date_col="observation_date"):
+    # Dates at freq from the earliest to the latest observation of any frame (on or after since)
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return pd.DatetimeIndex([])
+    start = min(frame[date_col].min() for frame in frames)
+    end = max(frame[date_col].max() for frame in frames)
+    if since is not None:
+        start = max(start, pd.Timestamp(since))
+    return pd.date_range(start, end, freq=FREQUENCIES.get(freq, freq))
+
+
+def asof_values(dates, values, index, max_staleness=None):
+    # Latest value at or before each index date: returns (values with NaN where missing, found mask)
+    dates = np.asarray(dates, dtype="datetime64[ns]")
+    values = np.asarray(values, dtype=float)
+    index = np.asarray(index, dtype="datetime64[ns]")
+    if len(dates) == 0:
+        return np.full(len(index), np.nan), np.zeros(len(index), dtype=bool)
+    if (dates[1:] < dates[:-1]).any():
+        order = np.argsort(dates, kind="stable")
+        dates, values = dates[order], values[order]
+
+    pos = np.searchsorted(dates, index, side="right") - 1
+    found = pos >= 0
+    pos = np.where(found, pos, 0)
+    picked = values[pos]
+    found &= ~np.isnan(picked)
+    if max_staleness is not None:
+        found &= (index - dates[pos]) <= np.timedelta64(pd.Timedelta(max_staleness))
+    return np.where(found, picked, np.nan), found
+
+
+def align(series, freq="MS", since=None, index=None, date_col="observation_date"):
+    # series: [(frame, value column, max staleness or None)]. Returns one frame on the target index
+    # holding the rows where every series has a fresh value.
+    if index is None:
+        index = target_index([frame for frame, _, _ in series], freq, since, date_col)
+    index = np.asarray(index, dtype="datetime64[ns]")
+    columns = {}
+    valid = np.ones(len(index), dtype=bool)
+    for frame, col, max_staleness in series:
+        columns[col], found = asof_values(frame[date_col], frame[col], index, max_staleness)
+        valid &= found
+    out = {date_col: index[valid]}
+    for col, values in columns.items():
+        out[col] = values[valid]
+    return pd.DataFrame(out)
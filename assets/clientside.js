@@ -0,0 +1,191 @@
+// =============================================================================
+// Clientside Callbacks
+// =============================================================================
+// The line graph, the combine/reset mode and the salary/career sync run in the browser. The
+// server only ships the county's base series once (county_series_store); dragging the salary
+// slider or switching modes re-renders from that store without a round-trip. Long series
+// arrive downsampled to the graph's width and are drawn with WebGL; zooming asks the server for
+// the visible window at full resolution. A picked career's yearly salaries come from the server
+// once per pick (career_salary_store).
+
+(function () {
+    var EXPENSE_TRACES = [
+        ["annual_mortgage", "Annual Mortgage"],
+        ["annual_gas", "Annual Gas"],
+        ["annual_elec", "Annual Electricity"],
+        ["annual_healthcare", "Annual Healthcare"]
+    ];
+    var NO_DATA_LABEL = "No data for this date";
+    // Same threshold as WEBGL_THRESHOLD in dashboard.py
+    var WEBGL_THRESHOLD = 1000;
+
+    // Same output as format_currency on the server, except at exact binary ties (e.g. 0.125),
+    // which toFixed rounds up and Python rounds to even. toFixed rounds the exact binary value
+    // like Python; toLocaleString would round its shortest decimal form (1.005 -> 1.01).
+    function formatCurrency(value) {
+        if (value === null || value === undefined || isNaN(value)) {
+            return NO_DATA_LABEL;
+        }
+        var fixed = Math.abs(value).toFixed(2);
+        var point = fixed.indexOf(".");
+        var text = fixed.slice(0, point).replace(/\B(?=(\d{3})+(?!\d))/g, ",") + fixed.slice(point);
+        return (value < 0 || Object.is(value, -0) ? "$-" : "$") + text;
+    }
+
+    function createTrace(x, y, name, line) {
+        if (y.length > WEBGL_THRESHOLD) {
+            return {
+                type: "scattergl",
+                x: x,
+                y: y,
+                mode: "lines",
+                name: name,
+                line: line || {},
+                hovertemplate: "%{y:$,.2f}"
+            };
+        }
+        return {
+            type: "scatter",
+            x: x,
+            y: y,
+            mode: "lines+markers",
+            name: name,
+            line: line || {},
+            hovertext: y.map(formatCurrency),
+            hoverinfo: "text+x"
+        };
+    }
+
+    // Same lookup as SalaryStore.series: yearly salaries from first_year on, clamped at both ends
+    function careerSalaries(careerSalary, dates) {
+        var salaries = careerSalary.salaries;
+        return dates.map(function (date) {
+            // Years outside the wage table take its last year's wage, as on the server
+            var pos = parseInt(date.slice(0, 4), 10) - careerSalary.first_year;
+            return salaries[pos < 0 || pos >= salaries.length ? salaries.length - 1 : pos];
+        });
+    }
+
+    function maxOf(values) {
+        var best = 0;
+        for (var i = 0; i < values.length; i++) {
+            if (values[i] !== null && values[i] > best) {
+                best = values[i];
+            }
+        }
+        return best;
+    }
+
+    function renderCostGraph(series, sliderSalary, career, mode, careerSalary) {
+        var hasCareer = career !== null && career !== undefined;
+        // A newly picked career renders once its salaries arrive (career_salary_store)
+        if (!series || (hasCareer && (!careerSalary || careerSalary.career !== career))) {
+            return window.dash_clientside.no_update;
+        }
+        var dates = series.dates;
+        var salaries = hasCareer ? careerSalaries(careerSalary, dates) : null;
+        var traces = [];
+
+        if (mode === "combined") {
+            traces.push(createTrace(dates, series.combined, "Combined Expenses"));
+            traces.push(createTrace(dates, series.median_income, "Median Income"));
+        } else {
+            EXPENSE_TRACES.forEach(function (pair) {
+                traces.push(createTrace(dates, series[pair[0]], pair[1]));
+            });
+            traces.push(createTrace(dates, series.median_income, "Median Income"));
+        }
+
+        // If a career is selected, show the time series; otherwise, show a constant trace.
+        if (hasCareer) {
+            traces.push(createTrace(dates, salaries, "Selected Salary", {dash: "dash"}));
+        } else {
+            traces.push({
+                type: "scatter",
+                x: [dates[0], dates[dates.length - 1]],
+                y: [sliderSalary, sliderSalary],
+                mode: "lines",
+                name: "Selected Salary",
+                line: {dash: "dash"},
+                hovertemplate: "Salary: " + formatCurrency(sliderSalary)
+            });
+        }
+
+        var layout = {
+            title: {text: "Annual Costs & Income in " + series.county + " County"},
+            xaxis: {title: {text: "Date"}, tickformat: "%b %d, %Y", tickmode: "auto"},
+            yaxis: {title: {text: "Annual Amount (USD)"}},
+            legend: {x: 0, y: 1.05, orientation: "h"},
+            hovermode: "closest",
+            // Keeps the user's zoom while the zoomed window is re-fetched
+            uirevision: series.county
+        };
+
+        // In combined mode, let y-axis auto-scale (it may start near 30k)
+        if (mode !== "combined") {
+            var avgSalary = sliderSalary;
+            if (hasCareer) {
+                avgSalary = salaries.reduce(function (a, b) { return a + b; }, 0) / (salaries.length || 1);
+            }
+            var maxVal = Math.max(
+                maxOf(series.annual_mortgage),
+                maxOf(series.annual_gas),
+                maxOf(series.annual_elec),
+                maxOf(series.annual_healthcare),
+                maxOf(series.median_income),
+                avgSalary || 0
+            );
+            layout.yaxis.range = [0, maxVal * 1.1];
+        }
+        return {data: traces, layout: layout};
+    }
+
+    // Width of the line graph in pixels (rounded), so the server downsamples to what is visible
+    function graphWidth(relayoutData, currentWidth) {
+        var el = document.getElementById("cost_graph");
+        var width = el ? Math.round(el.offsetWidth / 100) * 100 : 0;
+        if (!width || width === currentWidth) {
+            return window.dash_clientside.no_update;
+        }
+        return width;
+    }
+
+    // Synchronize salary slider and career dropdown
+    function syncSalary(sliderVal, dropdownVal) {
+        var triggered = window.dash_clientside.callback_context.triggered;
+        if (!triggered.length) {
+            throw window.dash_clientside.PreventUpdate;
+        }
+        var triggeredId = triggered[0].prop_id.split(".")[0];
+        if (triggeredId === "salary_slider") {
+            return [sliderVal, null];
+        } else if (triggeredId === "career_dropdown") {
+            return [0, dropdownVal];
+        }
+        throw window.dash_clientside.PreventUpdate;
+    }
+
+    // Update graph mode (combined vs. individual) based on button clicks
+    function updateMode(combineN, resetN, currentMode) {
+        var triggered = window.dash_clientside.callback_context.triggered;
+        if (!triggered.length || !triggered[0].value) {
+            return currentMode || "individual";
+        }
+        var buttonId = triggered[0].prop_id.split(".")[0];
+        if (buttonId === "combine_button") {
+            return "combined";
+        } else if (buttonId === "reset_button") {
+            return "individual";
+        }
+        return currentMode;
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        cost_graph: {
+            render: renderCostGraph,
+            graph_width: graphWidth,
+            sync_salary: syncSalary,
+            update_mode: updateMode
+        }
+    });
+})();
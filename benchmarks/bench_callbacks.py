@@ -0,0 +1,183 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+from plotly.utils import PlotlyJSONEncoder
+
+# =============================================================================
+# Callback Benchmark Suite
+# =============================================================================
+# Generates a synthetic data tree at the requested scale, points the app at it through DATA_DIR
+# and calls the loaders and callbacks directly as functions. Each benchmark reports wall time
+# (min/median over --repeat runs), peak Python-tracked memory and, for figures, the JSON size,
+# as one JSON document that can be saved per commit and compared with --compare. The timed runs
+# happen with tracemalloc off, since tracing slows allocation-heavy code; the peak comes from
+# one extra traced run.
+#
+#   python -m benchmarks.bench_callbacks --years 30 --counties 10 --healthcare-rows 1000000 \
+#       --output before.json
+#   python -m benchmarks.bench_callbacks ... --compare before.json
+
+
+def measure(func, repeat, setup=None, json_size=False):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    # Peak memory in a separate, untimed pass
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    report = {
+        "wall_ms_min": round(min(timings), 3),
+        "wall_ms_median": round(statistics.median(timings), 3),
+        "peak_kb": round(peak / 1024, 1)
+    }
+    if json_size:
+        # Figures, figure dicts and Dash components, serialized the way Dash sends them
+        report["json_bytes"] = len(json.dumps(result, cls=PlotlyJSONEncoder))
+    return report
+
+
+def run(years, counties, healthcare_rows, repeat, data_dir, occupations=5):
+    # The app modules read DATA_DIR (and its manifest) at import, so they are imported only after
+    # the synthetic tree is written
+    from benchmarks.synthetic import write_dataset
+
+    names = write_dataset(data_dir, years=years, counties=counties, healthcare_rows=healthcare_rows,
+                          occupations=occupations)
+    os.environ["DATA_DIR"] = data_dir
+
+    import county_data
+    import dashboard
+    from comparison import comparison_cache, load_all_counties
+    from figure_cache import figure_cache
+    from raw_data import RAW_TABLES, raw_table_cache
+    from salary_store import load_salary_store, salary_store
+    from variables_and_helper_methods import load_csv
+
+    sources = county_data.county_sources("LA")
+    results = {}
+    # Warm-up: the first load also persists the healthcare aggregate, like a first deployment
+    county_data.load_county_data("LA")
+
+    for kind in ("income", "listing", "gas"):
+        results[f"load_csv/{kind}"] = measure(lambda: load_csv(sources[kind]), repeat)
+    results["load_csv/healthcare"] = measure(lambda: load_csv(sources["healthcare"], date_col=None), repeat)
+
+    def load_all():
+        for name in names:
+            county_data.load_county_data(name)
+
+    def cold(cache):
+        # Cold means the datasets are parsed again too, not just the frames built from them
+        def setup():
+            county_data.dataset_cache.invalidate()
+            cache.invalidate()
+        return setup
+    results["load_county_data/cold"] = measure(load_all, repeat, setup=cold(county_data.county_cache))
+    results["load_county_data/warm"] = measure(load_all, repeat)
+    results["load_all_counties/cold"] = measure(load_all_counties, repeat, setup=cold(comparison_cache))
+
+    for mode in ("individual", "combined"):
+        results[f"update_line_graph/{mode}/cold"] = measure(
+            lambda: dashboard.update_line_graph("LA", 90000, None, mode), repeat, setup=figure_cache.clear,
+            json_size=True)
+        results[f"update_line_graph/{mode}/warm"] = measure(
+            lambda: dashboard.update_line_graph("LA", 90000, None, mode), repeat, json_size=True)
+    year = dashboard.max_year - 1
+    results["update_bar_graph/cold"] = measure(
+        lambda: dashboard.update_bar_graph("LA", 90000, "Data Analyst", year), repeat, setup=figure_cache.clear,
+        json_size=True)
+    results["update_bar_graph/warm"] = measure(
+        lambda: dashboard.update_bar_graph("LA", 90000, "Data Analyst", year), repeat, json_size=True)
+
+    results["salary_store/load"] = measure(load_salary_store, repeat)
+    results["salary_store/search"] = measure(lambda: salary_store.search("data"), repeat)
+    results["update_career_options"] = measure(lambda: dashboard.update_career_options("ana", None), repeat,
+                                               json_size=True)
+    results["update_career_salary"] = measure(lambda: dashboard.update_career_salary("Data Analyst"), repeat,
+                                              json_size=True)
+
+    for table in RAW_TABLES:
+        results[f"create_data_card/{table['id']}"] = measure(
+            lambda: dashboard.create_data_card(table), repeat, setup=raw_table_cache.invalidate, json_size=True)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline):
+    print(f"{'benchmark':<42} {'before ms':>10} {'after ms':>10} {'change':>8}")
+    for name, after in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        old, new = before["wall_ms_median"], after["wall_ms_median"]
+        change = f"{(new - old) / old:+.0%}" if old else "n/a"
+        print(f"{name:<42} {old:>10.2f} {new:>10.2f} {change:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the data loaders and callbacks on synthetic data")
+    parser.add_argument("--years", type=int, default=9, help="years of history per series")
+    parser.add_argument("--counties", type=int, default=3, help="number of counties (3 real + synthetic)")
+    parser.add_argument("--healthcare-rows", type=int, default=55_500)
+    parser.add_argument("--occupations", type=int, default=5, help="occupations in the wage table")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--data-dir", help="where to write the synthetic data (default: a temp dir)")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="JSON report of a previous run to compare against")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-data-") as tmp:
+        data_dir = args.data_dir or tmp
+        results = run(args.years, args.counties, args.healthcare_rows, args.repeat, data_dir, args.occupations)
+
+    import numpy
+    import pandas
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "pandas": pandas.__version__,
+            "numpy": numpy.__version__,
+            "years": args.years,
+            "counties": args.counties,
+            "healthcare_rows": args.healthcare_rows,
+            "occupations": args.occupations,
+            "repeat": args.repeat
+        },
+        "results": results
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    elif not args.compare:
+        print(text)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
@@ -0,0 +1,105 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objs as go
+
+import dashboard
+from cost_model import format_currency, observation_years
+
+# =============================================================================
+# Cost Model Micro-benchmark
+# =============================================================================
+# Times the per-element loops the line graph callback used to run against the vectorized cost
+# model, on synthetic county frames of increasing length.
+#
+#   python -m benchmarks.bench_cost_model --points 1000 10000 50000
+
+
+def synthetic_county_frame(points, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("1990-01-01", periods=points, freq="D")
+    return pd.DataFrame({
+        "observation_date": dates,
+        "median_income": rng.uniform(60000, 90000, points),
+        "annual_mortgage": rng.uniform(30000, 60000, points),
+        "annual_gas": rng.uniform(1500, 3000, points),
+        "annual_elec": rng.uniform(2000, 3500, points),
+        "annual_healthcare": rng.uniform(10000, 15000, points)
+    })
+
+
+# The callback body as it was before the cost model existed
+def legacy_salary_series(df, dropdown_val):
+    salaries = dict(zip(dashboard.salary_store.years.tolist(), dashboard.salary_store.row(dropdown_val).tolist()))
+    series = []
+    for date in df["observation_date"]:
+        series.append(salaries.get(date.year, salaries[max(salaries)]))
+    return series
+
+
+def legacy_hover_text(y, hover_format="${:,.2f}"):
+    hover_text = []
+    for val in y:
+        if pd.isna(val):
+            hover_text.append("No data for this date")
+        else:
+            hover_text.append(hover_format.format(val))
+    return hover_text
+
+
+def legacy_line_figure(df, dropdown_val):
+    user_salary_series = legacy_salary_series(df, dropdown_val)
+    fig = go.Figure()
+    for col in ["annual_mortgage", "annual_gas", "annual_elec", "annual_healthcare", "median_income"]:
+        fig.add_trace(go.Scatter(x=df["observation_date"], y=df[col], mode="lines+markers",
+                                 hovertext=legacy_hover_text(df[col]), hoverinfo="text+x"))
+    fig.add_trace(go.Scatter(x=df["observation_date"], y=user_salary_series, mode="lines+markers",
+                             hovertext=legacy_hover_text(user_salary_series), hoverinfo="text+x"))
+    return fig
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def run(points_list, repeat=5, career="Data Analyst"):
+    rows = []
+    for points in points_list:
+        df = synthetic_county_frame(points)
+        rows.append({
+            "points": points,
+            "salary_series_ms": (
+                best_of(lambda: legacy_salary_series(df, career), repeat),
+                best_of(lambda: dashboard.salary_store.series(
+                    career, observation_years(df["observation_date"])), repeat)
+            ),
+            "hover_text_ms": (
+                best_of(lambda: legacy_hover_text(df["annual_mortgage"]), repeat),
+                best_of(lambda: format_currency(df["annual_mortgage"]), repeat)
+            ),
+            "line_figure_ms": (
+                best_of(lambda: legacy_line_figure(df, career), repeat),
+                best_of(lambda: dashboard.build_line_figure(df, "LA", 0, career, "individual"), repeat)
+            )
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cost model before/after micro-benchmark")
+    parser.add_argument("--points", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'points':>8}  {'phase':<16} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+    for row in run(args.points, args.repeat):
+        for phase in ("salary_series_ms", "hover_text_ms", "line_figure_ms"):
+            before, after = row[phase]
+            print(f"{row['points']:>8}  {phase[:-3]:<16} {before:>10.2f} {after:>10.2f} {before / after:>7.1f}x")
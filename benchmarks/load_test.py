@@ -0,0 +1,492 @@
+import argparse
+import json
+import random
+import re
+import shlex
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# =============================================================================
+# Concurrent-User Load Test
+# =============================================================================
+# Starts the dashboard locally (or targets --url) and runs --users virtual users against it, each
+# on its own thread. A user loads the page (layout, dependencies and every initial callback) and
+# then replays random interactions with think time in between: county switches, salary slider
+# drags, career picks, combine/reset clicks, year slides and tab switches. Requests are built from
+# the app's own /_dash-dependencies exactly like the browser builds them, so every server callback
+# whose inputs an interaction touches is called, and the callbacks triggered by the same change
+# are sent in parallel. Components a response adds (a tab rendered on first visit) get their
+# initial callbacks, as in the browser. Background callbacks are polled at their interval until
+# the result arrives, and count as one callback from submission to result. The callbacks that run
+# in the browser (line graph, mode, salary/career sync) cost no request; their effect on the
+# inputs of server callbacks is replayed here.
+#
+# Reports p50/p95/p99 latency, throughput and error rate per callback and overall.
+#
+#   python -m benchmarks.load_test --users 20 --duration 60 --output load.json
+#   python -m benchmarks.load_test --users 50 --url http://127.0.0.1:8050
+
+DEFAULT_SERVER = [
+    sys.executable, "-c",
+    "import dashboard; dashboard.app.run(host='127.0.0.1', port={port}, debug=False, threaded=True)"
+]
+
+# Relative frequency of each interaction
+DEFAULT_MIX = {"county": 1, "slider": 3, "career": 2, "mode": 1, "year": 2, "tab": 1}
+
+# Pause between the releases of one slider drag and between a click pair, in seconds
+DRAG_PAUSE = 0.3
+
+# Concurrent requests per user, like a browser's per-host connection limit
+BROWSER_CONNECTIONS = 6
+
+
+def id_key(component_id):
+    # Dash's string form of an id: plain ids as is, pattern ids as sorted compact JSON
+    if isinstance(component_id, dict):
+        return json.dumps(component_id, sort_keys=True, separators=(",", ":"))
+    return component_id
+
+
+def _walk(component, values):
+    if isinstance(component, list):
+        for child in component:
+            _walk(child, values)
+        return
+    if not isinstance(component, dict) or "props" not in component:
+        return
+    props = component["props"]
+    if "id" in props:
+        values[id_key(props["id"])] = dict(props)
+    for value in props.values():
+        if isinstance(value, (dict, list)):
+            _walk(value, values)
+
+
+def _parse_outputs(output):
+    # "bar_graph.figure" or "..a.figure...b.children.." -> [(id, property)], multi
+    multi = output.startswith("..")
+    parts = output[2:-2].split("...") if multi else [output]
+    return [tuple(part.rsplit(".", 1)) for part in parts], multi
+
+
+def _pattern(dep_id):
+    return json.loads(dep_id) if dep_id.startswith("{") else None
+
+
+def _matches(pattern, component_id, fixed=None):
+    # fixed: the MATCH key values of the component the callback was triggered for
+    if not isinstance(component_id, dict) or set(component_id) != set(pattern):
+        return False
+    for key, wanted in pattern.items():
+        if isinstance(wanted, list):
+            if wanted == ["MATCH"] and fixed is not None and component_id[key] != fixed[key]:
+                return False
+        elif component_id[key] != wanted:
+            return False
+    return True
+
+
+# =============================================================================
+# Virtual User
+# =============================================================================
+
+class Session:
+    # One browser tab: the current value of every component property, and the server callbacks
+
+    def __init__(self, base_url, recorder, pool, rng, timeout):
+        self.base_url = base_url.rstrip("/")
+        self.recorder = recorder
+        self.pool = pool
+        self.rng = rng
+        self.timeout = timeout
+        self.values = {}
+        self.ids = {}
+        self.callbacks = []
+        self.end_id = None
+
+    def _send(self, path, payload=None, **query):
+        # (decoded JSON body or None, error or None)
+        if self.end_id is not None:
+            query["endId"] = self.end_id
+        url = self.base_url + path + ("?" + urllib.parse.urlencode(query) if query else "")
+        data = json.dumps(payload).encode() if payload is not None else None
+        request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                body = response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            return None, f"HTTP {e.code}"
+        except (OSError, ValueError) as e:
+            return None, type(e).__name__
+        if status != 200 or not body or not response.headers.get_content_type().endswith("json"):
+            return body.decode(errors="replace") if body else None, None
+        return json.loads(body), None
+
+    def _request(self, label, path, payload=None):
+        start = time.perf_counter()
+        result, error = self._send(path, payload)
+        self.recorder.record(label, time.perf_counter() - start, error)
+        return result
+
+    def _callback(self, label, payload, background):
+        # One callback as the browser sees it: a background callback answers with job handles
+        # first and is polled until its result arrives
+        start = time.perf_counter()
+        result, error = self._send("/_dash-update-component", payload)
+        if background is not None and isinstance(result, dict) and "cacheKey" in result:
+            handles = {"cacheKey": result["cacheKey"], "job": result["job"]}
+            result = None
+            while error is None:
+                time.sleep(background.get("interval", 1000) / 1000)
+                result, error = self._send("/_dash-update-component", payload, **handles)
+                if not isinstance(result, dict) or "response" in result:
+                    break
+        self.recorder.record(label, time.perf_counter() - start, error)
+        return result if isinstance(result, dict) else None
+
+    def load_page(self):
+        index = self._request("page/index", "/")
+        config = re.search(r'<script id="_dash-config" type="application/json">(.*?)</script>', index or "", re.S)
+        self.end_id = json.loads(config.group(1)).get("end_id") if config else None
+        layout = self._request("page/layout", "/_dash-layout")
+        dependencies = self._request("page/dependencies", "/_dash-dependencies")
+        if layout is None or dependencies is None:
+            return False
+        self.values = {}
+        self.ids = {}
+        self._register(layout)
+        self.callbacks = [dep for dep in dependencies if not dep.get("clientside_function")]
+        self.fire(None)
+        return True
+
+    def _register(self, component):
+        # Adds the components of a layout fragment; returns their id keys
+        found = {}
+        _walk(component, found)
+        for key, props in found.items():
+            self.values[key] = props
+            self.ids[key] = props["id"]
+        return set(found)
+
+    def _entry(self, component_id, prop):
+        return {"id": component_id, "property": prop, "value": self.values.get(id_key(component_id), {}).get(prop)}
+
+    def _resolve(self, spec, fixed):
+        pattern = _pattern(spec["id"])
+        if pattern is None:
+            return self._entry(spec["id"], spec["property"]) if spec["id"] in self.ids else None
+        matched = [self._entry(component_id, spec["property"]) for component_id in self.ids.values()
+                   if _matches(pattern, component_id, fixed)]
+        if ["MATCH"] in pattern.values():
+            return matched[0] if matched else None
+        return matched
+
+    def _instances(self, dep):
+        # The MATCH components a pattern callback runs for (or [None] for a plain callback)
+        patterns = [_pattern(spec["id"]) for spec in dep["inputs"]]
+        for pattern in patterns:
+            if pattern is not None and ["MATCH"] in pattern.values():
+                return [component_id for component_id in self.ids.values() if _matches(pattern, component_id)]
+        return [None]
+
+    def _touches(self, dep, fixed, added):
+        # Whether any input or output of the callback is among the `added` components
+        outputs, _ = _parse_outputs(dep["output"])
+        specs = dep["inputs"] + [{"id": output_id, "property": prop} for output_id, prop in outputs]
+        for spec in specs:
+            entry = self._resolve(spec, fixed)
+            for item in entry if isinstance(entry, list) else [entry] if entry else []:
+                if id_key(item["id"]) in added:
+                    return True
+        return False
+
+    def _payload(self, dep, fixed, changed):
+        # A callback runs only once all of its inputs, state and outputs are in the page
+        inputs = [self._resolve(spec, fixed) for spec in dep["inputs"]]
+        state = [self._resolve(spec, fixed) for spec in dep.get("state", [])]
+        if any(entry is None for entry in inputs + state):
+            return None
+        triggered = []
+        for entry in inputs:
+            for item in entry if isinstance(entry, list) else [entry]:
+                prop_id = f"{id_key(item['id'])}.{item['property']}"
+                if changed is None or (id_key(item["id"]), item["property"]) in changed:
+                    triggered.append(prop_id)
+        if changed is not None and not triggered:
+            return None
+        outputs, multi = _parse_outputs(dep["output"])
+        resolved = []
+        for output_id, prop in outputs:
+            entry = self._resolve({"id": output_id, "property": prop}, fixed)
+            if entry is None:
+                return None
+            if isinstance(entry, list):
+                resolved.append([{"id": item["id"], "property": prop} for item in entry])
+            else:
+                resolved.append({"id": entry["id"], "property": prop})
+        return {
+            "output": dep["output"],
+            "outputs": resolved if multi else resolved[0],
+            "inputs": inputs,
+            "state": state,
+            "changedPropIds": [] if changed is None else triggered
+        }
+
+    def fire(self, changed):
+        # Sends every server callback triggered by `changed` ({(id key, property)}, None = page
+        # load) in parallel, applies the responses and follows the chain of server callbacks
+        added = set()
+        while True:
+            requests = []
+            for dep in self.callbacks:
+                for fixed in self._instances(dep):
+                    initial = changed is None or self._touches(dep, fixed, added)
+                    if initial and dep.get("prevent_initial_call"):
+                        if changed is None:
+                            continue
+                        initial = False
+                    payload = self._payload(dep, fixed, None if initial else changed)
+                    if payload is not None:
+                        requests.append((callback_label(dep["output"]), payload, dep.get("background")))
+            futures = [self.pool.submit(self._callback, label, payload, background)
+                       for label, payload, background in requests]
+            changed = set()
+            added = set()
+            for future in futures:
+                result = future.result()
+                for key, props in ((result or {}).get("response") or {}).items():
+                    for prop, value in props.items():
+                        self.values.setdefault(key, {})[prop] = value
+                        changed.add((key, prop))
+                        if prop == "children":
+                            added |= self._register(value)
+            if not changed:
+                return
+
+    def set(self, component_id, prop, value):
+        # A user edit, plus what the browser-side callbacks change in response
+        self.values.setdefault(component_id, {})[prop] = value
+        changed = {(component_id, prop)}
+        if component_id == "salary_slider" and self.values.get("career_dropdown", {}).get("value") is not None:
+            self.values["career_dropdown"]["value"] = None
+            changed.add(("career_dropdown", "value"))
+        elif component_id == "career_dropdown" and value is not None:
+            self.values["salary_slider"]["value"] = 0
+            changed.add(("salary_slider", "value"))
+        self.fire(changed)
+
+    def _options(self, component_id):
+        options = self.values[component_id].get("options") or []
+        return [option["value"] if isinstance(option, dict) else option for option in options]
+
+    # Interactions ---------------------------------------------------------------------------
+
+    def county(self):
+        current = self.values["county_radio"].get("value")
+        choices = [value for value in self._options("county_radio") if value != current]
+        if choices:
+            self.set("county_radio", "value", self.rng.choice(choices))
+
+    def slider(self):
+        # A drag is a few releases (the slider reports on mouseup) moving in one direction
+        props = self.values["salary_slider"]
+        low, high, step = props["min"], props["max"], props.get("step") or 1
+        value = props.get("value") or low
+        direction = self.rng.choice([-1, 1])
+        for _ in range(self.rng.randint(1, 4)):
+            value = min(max(value + direction * step * self.rng.randint(1, 6), low), high)
+            self.set("salary_slider", "value", value)
+            time.sleep(DRAG_PAUSE)
+
+    def career(self):
+        self.set("career_dropdown", "value", self.rng.choice(self._options("career_dropdown")))
+
+    def mode(self):
+        # Combine then reset: both are handled in the browser, only the clicks are replayed
+        for button in ("combine_button", "reset_button"):
+            self.set(button, "n_clicks", (self.values[button].get("n_clicks") or 0) + 1)
+            time.sleep(DRAG_PAUSE)
+
+    def tab(self):
+        tabs = self.values["tabs"]
+        choices = [child["props"]["tab_id"] for child in tabs.get("children") or []
+                   if child["props"]["tab_id"] != tabs.get("active_tab")]
+        if choices:
+            self.set("tabs", "active_tab", self.rng.choice(choices))
+
+    def year(self):
+        props = self.values["year_slider"]
+        self.set("year_slider", "value", self.rng.randint(props["min"], props["max"]))
+
+
+def callback_label(output):
+    # Readable name of a callback: its output component ids
+    outputs, _ = _parse_outputs(output)
+    names = []
+    for output_id, _ in outputs:
+        pattern = _pattern(output_id)
+        name = pattern.get("type", output_id) if pattern else output_id
+        if name not in names:
+            names.append(name)
+    return "+".join(names)
+
+
+# =============================================================================
+# Recording and Reporting
+# =============================================================================
+
+class Recorder:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.errors = {}
+
+    def record(self, label, seconds, error):
+        with self.lock:
+            self.samples.setdefault(label, []).append((seconds, error is None))
+            if error is not None:
+                errors = self.errors.setdefault(label, {})
+                errors[error] = errors.get(error, 0) + 1
+
+    def summary(self, elapsed):
+        with self.lock:
+            samples = {label: list(values) for label, values in self.samples.items()}
+            errors = {label: dict(counts) for label, counts in self.errors.items()}
+        samples["total"] = [sample for values in samples.values() for sample in values]
+        report = {}
+        for label, values in samples.items():
+            latencies = np.array([seconds for seconds, _ in values]) * 1000
+            failed = sum(1 for _, ok in values if not ok)
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (0, 0, 0)
+            report[label] = {
+                "requests": len(values),
+                "errors": failed,
+                "error_rate": round(failed / len(values), 4) if values else 0,
+                "throughput_rps": round(len(values) / elapsed, 2),
+                "p50_ms": round(float(p50), 1),
+                "p95_ms": round(float(p95), 1),
+                "p99_ms": round(float(p99), 1),
+                "max_ms": round(float(latencies.max()), 1) if len(latencies) else 0
+            }
+            if label in errors:
+                report[label]["error_types"] = errors[label]
+        return report
+
+
+def print_report(report):
+    print(f"{'callback':<32} {'requests':>8} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for label, row in sorted(report.items(), key=lambda item: (item[0] == "total", item[0])):
+        print(f"{label:<32} {row['requests']:>8} {row['throughput_rps']:>7.2f} {row['p50_ms']:>8.1f} "
+              f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['error_rate']:>7.1%}")
+
+
+# =============================================================================
+# Runner
+# =============================================================================
+
+def run_user(base_url, recorder, pool, seed, deadline, think, mix, timeout):
+    rng = random.Random(seed)
+    session = Session(base_url, recorder, pool, rng, timeout)
+    if not session.load_page():
+        return
+    actions, weights = zip(*mix.items())
+    while time.monotonic() < deadline:
+        time.sleep(min(rng.expovariate(1 / think) if think > 0 else 0, max(deadline - time.monotonic(), 0)))
+        if time.monotonic() >= deadline:
+            break
+        getattr(session, rng.choices(actions, weights)[0])()
+
+
+def run(base_url, users, duration, ramp_up, think, mix, seed, timeout):
+    recorder = Recorder()
+    start = time.monotonic()
+    deadline = start + duration
+    with ThreadPoolExecutor(max_workers=users * BROWSER_CONNECTIONS) as pool:
+        threads = []
+        for i in range(users):
+            thread = threading.Thread(target=run_user, daemon=True,
+                                      args=(base_url, recorder, pool, seed + i, deadline, think, mix, timeout))
+            thread.start()
+            threads.append(thread)
+            if ramp_up and users > 1:
+                time.sleep(ramp_up / (users - 1))
+        for thread in threads:
+            thread.join()
+    return recorder.summary(time.monotonic() - start)
+
+
+def start_server(server_cmd, port, timeout=120, env=None):
+    command = shlex.split(server_cmd.format(port=port)) if server_cmd else \
+        [part.format(port=port) for part in DEFAULT_SERVER]
+    process = subprocess.Popen(command, env=env)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(url + "/_dash-layout", timeout=5):
+                return process, url
+        except OSError:
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f"server did not answer on {url} within {timeout}s")
+
+
+def parse_mix(text):
+    mix = dict(DEFAULT_MIX)
+    for part in filter(None, text.split(",")):
+        name, weight = part.split("=")
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown interaction {name!r}, expected one of {', '.join(DEFAULT_MIX)}")
+        mix[name] = float(weight)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay concurrent user sessions against the dashboard")
+    parser.add_argument("--url", help="target a running server instead of starting one")
+    parser.add_argument("--server-cmd", help="command that starts the server, with {port} (default: Flask dev server)")
+    parser.add_argument("--port", type=int, default=8051)
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load")
+    parser.add_argument("--ramp-up", type=float, default=0, help="seconds over which users start")
+    parser.add_argument("--think", type=float, default=1.0, help="mean think time between interactions, seconds")
+    parser.add_argument("--mix", type=parse_mix, default=dict(DEFAULT_MIX),
+                        help="interaction weights, e.g. county=1,slider=3,career=2,mode=1,year=2,tab=1")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=30, help="per-request timeout, seconds")
+    parser.add_argument("--output", help="also write the JSON report here")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server, url = start_server(args.server_cmd, args.port)
+    try:
+        results = run(url, args.users, args.duration, args.ramp_up, args.think, args.mix, args.seed, args.timeout)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print_report(results)
+    if args.output:
+        report = {
+            "meta": {"url": url, "users": args.users, "duration": args.duration, "think": args.think,
+                     "mix": args.mix, "seed": args.seed, "server_cmd": args.server_cmd},
+            "results": results
+        }
+        with open(args.output, "w") as f:
+            f.write(json.dumps(report, indent=2) + "\n")
@@ -0,0 +1,141 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# =============================================================================
+# Synthetic Datasets
+# =============================================================================
+# Writes FRED-shaped series (observation_date,<value>) and a Kaggle-shaped healthcare file at any
+# scale for every dataset of data/manifest.json, into a separate data directory with its own
+# manifest. Counties past the three real ones get their own income and listing files and share
+# the LA electricity/gas and healthcare files, like OC and Ventura do. The occupation wage table
+# gets any number of occupations over the same years, with some years missing.
+
+BASE_MANIFEST = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "manifest.json")
+
+END_DATE = pd.Timestamp("2024-12-01")
+
+# Value column -> (start low, start high, drift, noise, decimals) of its random walk
+SERIES_WALKS = {
+    "median_income": (60000, 90000, 0.03, 0.02, 0),
+    "listing_price": (600000, 900000, 0.004, 0.015, 0),
+    "elec_price": (0.19, 0.19, 0.004, 0.02, 3),
+    "gas_price": (3.0, 3.0, 0.002, 0.04, 3)
+}
+
+HEALTHCARE_CONDITIONS = ["Cancer", "Obesity", "Diabetes", "Asthma", "Hypertension", "Arthritis"]
+
+# Occupations are the real careers, then "<field> <role>" combinations
+CAREERS = ["Computer Systems Analyst", "Data Analyst", "Data Scientist", "Full Stack Developer", "Web Developer"]
+OCCUPATION_FIELDS = ["Accounting", "Aerospace", "Agricultural", "Biomedical", "Budget", "Chemical", "Civil",
+                     "Clinical", "Compliance", "Construction", "Credit", "Database", "Electrical", "Environmental",
+                     "Financial", "Healthcare", "Industrial", "Insurance", "Logistics", "Marketing",
+                     "Mechanical", "Network", "Operations", "Payroll", "Research", "Sales", "Security",
+                     "Software", "Statistical", "Training"]
+OCCUPATION_ROLES = ["Analyst", "Assistant", "Clerk", "Coordinator", "Engineer", "Manager", "Specialist",
+                    "Supervisor", "Technician", "Director"]
+WAGE_REGIONS = ["US", "California"]
+
+
+def _write_series(path, dates, column, values):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pd.DataFrame({"observation_date": dates.strftime("%Y-%m-%d"), column: values}).to_csv(path, index=False)
+
+
+def _random_walk(rng, start, periods, drift, noise):
+    return start * np.exp(np.cumsum(rng.normal(drift, noise, periods)))
+
+
+def write_healthcare(path, rows, start, end, seed=0):
+    rng = np.random.default_rng(seed)
+    days = max((end - start).days, 1)
+    admitted = start + pd.to_timedelta(rng.integers(0, days, rows), unit="D")
+    discharged = admitted + pd.to_timedelta(rng.integers(1, 30, rows), unit="D")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pd.DataFrame({
+        "Name": np.char.add("Patient ", np.arange(rows).astype(str)),
+        "Age": rng.integers(18, 90, rows),
+        "Gender": rng.choice(["Male", "Female"], rows),
+        "Blood Type": rng.choice(["A+", "A-", "B+", "B-", "O+", "O-", "AB+", "AB-"], rows),
+        "Medical Condition": rng.choice(HEALTHCARE_CONDITIONS, rows),
+        "Date of Admission": admitted.strftime("%Y-%m-%d"),
+        "Doctor": "Dr. Synthetic",
+        "Hospital": rng.choice(["General", "County", "Memorial"], rows),
+        "Insurance Provider": rng.choice(["Aetna", "Blue Cross", "Cigna", "Medicare", "UnitedHealthcare"], rows),
+        "Billing Amount": rng.uniform(1000, 50000, rows).round(2),
+        "Room Number": rng.integers(100, 500, rows),
+        "Admission Type": rng.choice(["Elective", "Emergency", "Urgent"], rows),
+        "Discharge Date": discharged.strftime("%Y-%m-%d"),
+        "Medication": rng.choice(["Aspirin", "Ibuprofen", "Lipitor", "Paracetamol", "Penicillin"], rows),
+        "Test Results": rng.choice(["Normal", "Abnormal", "Inconclusive"], rows)
+    }).to_csv(path, index=False)
+
+
+def write_wages(path, occupations, start_year, end_year, seed=0):
+    rng = np.random.default_rng(seed)
+    names = (CAREERS + [f"{field} {role}" for field in OCCUPATION_FIELDS for role in OCCUPATION_ROLES])[:occupations]
+    years = np.arange(start_year, end_year + 1)
+    rows = []
+    for name in names:
+        wages = _random_walk(rng, rng.uniform(40000, 160000), len(years), 0.02, 0.03)
+        for region in WAGE_REGIONS:
+            scale = 1.0 if region == "US" else rng.uniform(1.0, 1.25)
+            # Roughly one year in five is missing, as in published wage tables
+            kept = rng.random(len(years)) > 0.2
+            rows.extend((name, region, int(year), round(wage * scale))
+                        for year, wage, keep in zip(years, wages, kept) if keep)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pd.DataFrame(rows, columns=["occupation", "region", "year", "annual_wage"]).to_csv(path, index=False)
+    return names
+
+
+def write_dataset(data_dir, years=9, counties=3, healthcare_rows=55_500, seed=0, manifest=BASE_MANIFEST,
+                  occupations=5):
+    # Writes every dataset of the manifest under data_dir, plus a manifest that declares counties
+    # beyond the ones it already has (own income and listing series, the rest through the first
+    # county as fallback). Returns the list of county names.
+    rng = np.random.default_rng(seed)
+    start = END_DATE - pd.DateOffset(years=years)
+    dates = {"annual": pd.date_range(start, END_DATE, freq="YS"),
+             "monthly": pd.date_range(start, END_DATE, freq="MS")}
+
+    with open(manifest) as f:
+        spec = json.load(f)
+    datasets = spec["datasets"]
+    county_specs = spec["counties"]
+    names = list(county_specs)[:counties]
+    spec["counties"] = {name: county_specs[name] for name in names}
+    first = county_specs[names[0]]["series"]
+    for i in range(len(names), counties):
+        name = f"C{i + 1}"
+        series = {}
+        for kind in ("income", "listing"):
+            dataset = dict(datasets[first[kind]], title=f"{kind.title()} - Synthetic County {name}",
+                           region=f"Synthetic County {name}")
+            dataset.pop("fred_id", None)
+            folder, file_name = dataset["path"].rsplit("/", 1)
+            dataset["path"] = f"{folder}/{file_name[:-4]}_{name}.csv"
+            datasets[f"{first[kind]}_{name}"] = dataset
+            series[kind] = f"{first[kind]}_{name}"
+        spec["counties"][name] = {"label": f"Synthetic County {name}", "series": series, "fallback": names[0]}
+        names.append(name)
+
+    for dataset in datasets.values():
+        path = os.path.join(data_dir, *dataset["path"].split("/"))
+        if dataset.get("format") == "healthcare":
+            write_healthcare(path, healthcare_rows, start, END_DATE, seed)
+            continue
+        low, high, drift, noise, digits = SERIES_WALKS[dataset["column"]]
+        index = dates[dataset["frequency"]]
+        _write_series(path, index, dataset["column"],
+                      _random_walk(rng, rng.uniform(low, high), len(index), drift, noise).round(digits))
+    if spec.get("salaries"):
+        write_wages(os.path.join(data_dir, *spec["salaries"]["path"].split("/")), occupations,
+                    start.year, END_DATE.year, seed)
+
+    os.makedirs(data_dir, exist_ok=True)
+    with open(os.path.join(data_dir, "manifest.json"), "w") as f:
+        json.dump(spec, f, indent=2)
+    return names
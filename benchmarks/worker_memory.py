@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+from benchmarks.load_test import DEFAULT_MIX, run, start_server
+from metrics import process_memory
+
+# =============================================================================
+# Per-Worker Memory Report
+# =============================================================================
+# Serves the dashboard with gunicorn (gunicorn.conf.py) once with the preloading master and once
+# with one import per worker (PRELOAD_APP=0). Each run replays a short load test so every worker
+# touches the data, then reads the RSS, PSS, shared and private memory of the master and of each
+# worker from /proc (Linux only). RSS counts shared pages in every process that maps them. The
+# sums of PSS and private memory show what another worker really costs.
+#
+#   python -m benchmarks.worker_memory --workers 4 --duration 20 --output memory.json
+
+MODES = {"preload": "1", "per-worker": "0"}
+
+
+def worker_pids(master_pid):
+    with open(f"/proc/{master_pid}/task/{master_pid}/children") as f:
+        return [int(pid) for pid in f.read().split()]
+
+
+def measure(preload, workers, port, users, duration, think, seed):
+    env = dict(os.environ, PRELOAD_APP=preload, WEB_WORKERS=str(workers))
+    command = f"{sys.executable} -m gunicorn dashboard:server --bind 127.0.0.1:{{port}}"
+    server, url = start_server(command, port, timeout=300, env=env)
+    try:
+        deadline = time.monotonic() + 60
+        while len(worker_pids(server.pid)) < workers and time.monotonic() < deadline:
+            time.sleep(0.5)
+        results = run(url, users, duration, 0, think, DEFAULT_MIX, seed, 30)
+        processes = [("master", server.pid)] + [("worker", pid) for pid in worker_pids(server.pid)]
+        rows = [dict(process_memory(pid), role=role, pid=pid) for role, pid in processes]
+    finally:
+        server.terminate()
+        server.wait()
+    totals = {kind: sum(row.get(kind, 0) for row in rows) for kind in ("rss", "pss", "shared", "private")}
+    return {"processes": rows, "totals": totals, "error_rate": results["total"]["error_rate"],
+            "requests": results["total"]["requests"]}
+
+
+def print_report(reports):
+    mib = 2 ** 20
+    for mode, report in reports.items():
+        print(f"{mode}: {report['requests']} requests, {report['error_rate']:.1%} errors")
+        print(f"  {'process':<8} {'pid':>7} {'RSS MiB':>9} {'PSS MiB':>9} {'shared MiB':>11} {'private MiB':>12}")
+        for row in report["processes"] + [dict(report["totals"], role="total", pid="")]:
+            print(f"  {row['role']:<8} {row['pid']:>7} {row.get('rss', 0) / mib:>9.1f} {row.get('pss', 0) / mib:>9.1f} "
+                  f"{row.get('shared', 0) / mib:>11.1f} {row.get('private', 0) / mib:>12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-worker memory of preloaded vs. per-worker gunicorn serving")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8052)
+    parser.add_argument("--users", type=int, default=8, help="virtual users of the load replayed before measuring")
+    parser.add_argument("--duration", type=float, default=20, help="seconds of load before measuring")
+    parser.add_argument("--think", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mode", choices=list(MODES), action="append", help="measure only these modes")
+    parser.add_argument("--output", help="also write the JSON report here")
+    args = parser.parse_args()
+
+    reports = {mode: measure(MODES[mode], args.workers, args.port, args.users, args.duration, args.think, args.seed)
+               for mode in args.mode or MODES}
+    print_report(reports)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(json.dumps({"meta": vars(args), "reports": reports}, indent=2) + "\n")
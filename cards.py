@@ -1,6 +1,14 @@
 import dash_bootstrap_components as dbc
 from dash import dcc
 
+from datasets import registry
+from salary_store import career_options, salary_store
+
+# Salary slider range in USD (also the salary steps export.py renders)
+SALARY_MIN = 35000
+SALARY_MAX = 300000
+SALARY_STEP = 5000
+
 # =============================================================================
 # Define Individual Cards for the Play Tab Controls
 # =============================================================================
@@ -24,12 +32,9 @@ county_card = dbc.Card(
         dbc.CardBody(
             dcc.RadioItems(
                 id="county_radio",
-                options=[
-                    {"label": "Los Angeles County", "value": "LA"},
-                    {"label": "Orange County", "value": "OC"},
-                    {"label": "Ventura County", "value": "Ventura"}
-                ],
-                value="LA",
+                # Counties come from data/manifest.json, the first one is selected
+                options=[{"label": county.label, "value": name} for name, county in registry.counties.items()],
+                value=next(iter(registry.counties)),
                 className="mb-2"
             )
         ),
@@ -43,10 +48,10 @@ salary_slider_card = dbc.Card(
         dbc.CardBody(
             dcc.Slider(
                 id="salary_slider",
-                min=35000,
-                max=300000,
-                step=5000,
-                value=35000,
+                min=SALARY_MIN,
+                max=SALARY_MAX,
+                step=SALARY_STEP,
+                value=SALARY_MIN,
                 marks={
                     35000: "35k",
                     60000: "60k",
@@ -72,14 +77,9 @@ career_card = dbc.Card(
         dbc.CardBody(
             dcc.Dropdown(
                 id="career_dropdown",
-                options=[
-                    {"label": "Data Scientist", "value": "Data Scientist"},
-                    {"label": "Web Developer", "value": "Web Developer"},
-                    {"label": "Full Stack Developer", "value": "Full Stack Developer"},
-                    {"label": "Data Analyst", "value": "Data Analyst"},
-                    {"label": "Computer Systems Analyst", "value": "Computer Systems Analyst"}
-                ],
-                placeholder="Select a career",
+                # The first occupations only; typing searches all of them (update_career_options)
+                options=career_options(salary_store.search("")),
+                placeholder="Search careers",
                 className="mb-2"
             )
         ),
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+
+from alignment import asof_values, target_index
+from cost_model import EXPENSE_COLUMNS, annual_expenses
+from county_data import (ALIGN_FREQUENCY, SERIES_COLUMNS, FrameCache, county_datasets, county_sources,
+                         load_dataset)
+from datasets import registry
+
+# =============================================================================
+# Multi-county Batch Comparison
+# =============================================================================
+# Builds every county in one long-format frame (county, observation_date, ...). Each dataset
+# is loaded once and every county is aligned onto the same target index: series that every
+# county shares (the LA electricity/gas fallbacks and the healthcare aggregate) are aligned once
+# and broadcast across counties, and only the county-specific series (income, listings) are
+# aligned per county. The annual expenses and the affordability metrics are then computed once
+# over the whole frame, so another county adds rows, not another pipeline run.
+
+METRICS = {
+    "expense_share": "Combined expenses / median income",
+    "housing_share": "Annual mortgage / median income",
+    "surplus": "Median income - combined expenses",
+    "combined_expenses": "Combined expenses"
+}
+
+
+def _aligned(dataset, index):
+    frame = load_dataset(dataset.id)
+    return asof_values(frame["observation_date"], frame[dataset.column], index, dataset.max_staleness)
+
+
+def build_all_counties(counties=None, freq=ALIGN_FREQUENCY):
+    counties = list(counties or registry.counties)
+    shared = {}
+    county_specific = {}
+    for kind in SERIES_COLUMNS:
+        datasets = {county: county_datasets(county)[kind] for county in counties}
+        if len({dataset.id for dataset in datasets.values()}) == 1:
+            shared[kind] = datasets[counties[0]]
+        else:
+            county_specific[kind] = datasets
+    used = {dataset.id for dataset in shared.values()}
+    used.update(dataset.id for datasets in county_specific.values() for dataset in datasets.values())
+
+    # One index for every county; rows without a fresh value of every series drop out per county,
+    # which gives the same rows as aligning each county on its own.
+    index = np.asarray(target_index([load_dataset(dataset_id) for dataset_id in sorted(used)], freq),
+                       dtype="datetime64[ns]")
+    shared_values = {}
+    shared_found = np.ones(len(index), dtype=bool)
+    for kind, dataset in shared.items():
+        shared_values[SERIES_COLUMNS[kind]], found = _aligned(dataset, index)
+        shared_found &= found
+
+    parts = []
+    for county in counties:
+        values = dict(shared_values)
+        valid = shared_found.copy()
+        for kind, datasets in county_specific.items():
+            values[SERIES_COLUMNS[kind]], found = _aligned(datasets[county], index)
+            valid &= found
+        part = {"county": np.full(valid.sum(), county, dtype=object), "observation_date": index[valid]}
+        part.update((col, column[valid]) for col, column in values.items())
+        parts.append(pd.DataFrame(part))
+    df = pd.concat(parts, ignore_index=True)
+
+    df = df.assign(**annual_expenses(df["listing_price"], df["gas_price"],
+                                     df["elec_price"], df["healthcare_cost"]))
+    df = df[["county", "observation_date", "median_income", "listing_price"] + EXPENSE_COLUMNS]
+    df = df.sort_values(["county", "observation_date"], kind="stable").reset_index(drop=True)
+    return df
+
+
+def add_affordability(df):
+    # Per-row metrics, computed column-wise over every county at once
+    combined = df[EXPENSE_COLUMNS].to_numpy(dtype=float).sum(axis=1)
+    income = df["median_income"].to_numpy(dtype=float)
+    return df.assign(
+        combined_expenses=combined,
+        expense_share=combined / income,
+        housing_share=df["annual_mortgage"].to_numpy(dtype=float) / income,
+        surplus=income - combined
+    )
+
+
+def affordability_summary(df):
+    # One row per county: latest values plus the average expense share over the whole history
+    df = add_affordability(df)
+    latest = df.groupby("county").tail(1).set_index("county")
+    summary = latest[["observation_date", "median_income", "combined_expenses", "expense_share",
+                      "housing_share", "surplus"]].copy()
+    summary["mean_expense_share"] = df.groupby("county")["expense_share"].mean()
+    summary["observations"] = df.groupby("county").size()
+    return summary.reset_index()
+
+
+def _all_sources(key):
+    paths = {}
+    for county in registry.counties:
+        for kind, path in county_sources(county).items():
+            paths[f"{county}.{kind}"] = path
+    return paths
+
+
+comparison_cache = FrameCache(lambda key: build_all_counties(), _all_sources, name="comparison")
+
+
+def load_all_counties():
+    return comparison_cache.get("all")
@@ -0,0 +1,64 @@
+import numpy as np
+
+from variables_and_helper_methods import (monthly_mortgage, monthly_gas_cost,
+                                          monthly_elec_cost, monthly_healthcare_cost)
+
+# =============================================================================
+# Vectorized Cost Model
+# =============================================================================
+# Everything the callbacks need per data point (annual expenses and the years career salaries
+# are looked up for) is computed here as whole-array NumPy operations instead of Python loops.
+# Hover labels are the exception: formatting Python floats one by one is faster.
+
+EXPENSE_COLUMNS = ["annual_mortgage", "annual_gas", "annual_elec", "annual_healthcare"]
+
+NO_DATA_LABEL = "No data for this date"
+
+
+def annual_expenses(listing_price, gas_price, elec_price, healthcare_cost):
+    # Convert monthly values to annual by multiplying by 12
+    return {
+        "annual_mortgage": monthly_mortgage(np.asarray(listing_price, dtype=float)) * 12,
+        "annual_gas": monthly_gas_cost(np.asarray(gas_price, dtype=float)) * 12,
+        "annual_elec": monthly_elec_cost(np.asarray(elec_price, dtype=float)) * 12,
+        "annual_healthcare": monthly_healthcare_cost(np.asarray(healthcare_cost, dtype=float)) * 12
+    }
+
+
+def combined_expenses(df):
+    return df[EXPENSE_COLUMNS].to_numpy(dtype=float).sum(axis=1)
+
+
+def observation_years(dates):
+    return np.asarray(dates, dtype="datetime64[Y]").astype(int) + 1970
+
+
+# =============================================================================
+# Yearly Rollup
+# =============================================================================
+
+ROLLUP_COLUMNS = ["median_income"] + EXPENSE_COLUMNS + ["combined_expenses"]
+
+
+def yearly_rollup(df):
+    # One row per calendar year: mean of income and each expense, row count and min/max
+    values = df[["median_income"] + EXPENSE_COLUMNS].astype(float).assign(combined_expenses=combined_expenses(df))
+    grouped = values.groupby(observation_years(df["observation_date"]))
+    rollup = grouped.mean()
+    rollup["rows"] = grouped.size()
+    for col in ROLLUP_COLUMNS:
+        rollup[f"{col}_min"] = grouped[col].min()
+        rollup[f"{col}_max"] = grouped[col].max()
+    rollup.index.name = "year"
+    return rollup
+
+
+# =============================================================================
+# Hover Labels
+# =============================================================================
+
+def format_currency(values):
+    # "${:,.2f}".format(v) per value, with NaN mapped to NO_DATA_LABEL. A plain loop over Python
+    # floats beats the NumPy string routines here (benchmarks/bench_cost_model.py).
+    return ["${:,.2f}".format(v) if v == v else NO_DATA_LABEL
+            for v in np.asarray(values, dtype=float).tolist()]
@@ -0,0 +1,325 @@
+import functools
+import hashlib
+import os
+import threading
+import time
+
+import pandas as pd
+
+from alignment import align
+from cost_model import annual_expenses, yearly_rollup
+from datasets import registry
+from healthcare import aggregate_healthcare, load_healthcare_by_date
+from metrics import phase
+from variables_and_helper_methods import load_csv
+
+# =============================================================================
+# County Datasets
+# =============================================================================
+# Which file backs which series of which county is declared in data/manifest.json (see
+# datasets.py); the fallbacks there give OC and Ventura the LA electricity and gas series.
+
+# Value column of each series kind in the county frames; every county needs all of them
+SERIES_COLUMNS = {
+    "income": "median_income",
+    "listing": "listing_price",
+    "elec": "elec_price",
+    "gas": "gas_price",
+    "healthcare": "healthcare_cost"
+}
+
+# Frequency the county frames are aligned to (see alignment.FREQUENCIES)
+ALIGN_FREQUENCY = "monthly"
+
+
+def county_datasets(county):
+    # {series kind: Dataset} of a county, fallbacks resolved
+    datasets = registry.county(county).datasets
+    missing = [kind for kind in SERIES_COLUMNS if kind not in datasets]
+    if missing:
+        raise ValueError(f"County {county} has no dataset for: {', '.join(missing)}")
+    return datasets
+
+
+def county_sources(county):
+    return {kind: dataset.path for kind, dataset in county_datasets(county).items()}
+
+
+def series_frame(dataset, kind):
+    # The shared frame of a dataset, with its value column named after the series kind
+    frame = load_dataset(dataset.id)
+    column = SERIES_COLUMNS[kind]
+    return frame if dataset.column == column else frame.rename(columns={dataset.column: column})
+
+
+def snapshot_tables():
+    # Every CSV the dashboard reads, with the date column load_csv parses (None = raw)
+    return {dataset.path: dataset.date_col for dataset in registry.datasets.values()}
+
+
+def snapshot_series():
+    # The healthcare aggregate is persisted under one name, so one healthcare dataset is supported
+    healthcare = [dataset for dataset in registry.datasets.values() if dataset.format == "healthcare"]
+    return {"healthcare_by_date": (healthcare[0].path, aggregate_healthcare)} if healthcare else {}
+
+
+# =============================================================================
+# County Data Pipeline
+# =============================================================================
+
+def build_county_data(county, since=None, freq=ALIGN_FREQUENCY):
+    # With `since`, only rows dated on or after it are built (used to extend a cached frame).
+    # Earlier observations are still read, since they forward-fill into those rows.
+    datasets = county_datasets(county)
+    series = [(series_frame(datasets[kind], kind), col, datasets[kind].max_staleness)
+              for kind, col in SERIES_COLUMNS.items()]
+
+    # Align every series onto one index (as-of, within each series' staleness limit)
+    with phase("load_county_data", "align"):
+        df = align(series, freq=freq, since=since)
+
+    with phase("load_county_data", "expenses"):
+        df = df.assign(**annual_expenses(df["listing_price"], df["gas_price"],
+                                         df["elec_price"], df["healthcare_cost"]))
+
+    return df[[
+        "observation_date",
+        "median_income",  # assumed annual
+        "annual_mortgage",
+        "annual_gas",
+        "annual_elec",
+        "annual_healthcare"
+    ]]
+
+
+# =============================================================================
+# County Data Cache
+# =============================================================================
+
+def freeze_frame(df):
+    # Rebuild the frame on top of non-writeable arrays so in-place edits raise instead of
+    # silently corrupting the shared copy.
+    columns = {}
+    for col in df.columns:
+        values = df[col].to_numpy(copy=True)
+        values.flags.writeable = False
+        columns[col] = values
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+def file_fingerprint(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class _CacheEntry:
+    def __init__(self, frame, fingerprints, hashes, version):
+        self.frame = frame
+        self.fingerprints = fingerprints
+        self.hashes = hashes
+        self.version = version
+        self.token = hashlib.sha1("|".join(hashes[path] for path in sorted(hashes)).encode()).hexdigest()
+        self.checked_at = time.monotonic()
+
+
+class FrameCache:
+    # Process-wide cache of frames keyed by name (a county, a raw table, ...). Source files are
+    # re-checked at most once per check_interval seconds: a changed mtime/size triggers a content
+    # hash, and the frame is only rebuilt when the bytes actually changed.
+
+    def __init__(self, loader, sources, check_interval=2.0, name="frames"):
+        self.name = name
+        self.loader = loader
+        self.sources = sources
+        self.check_interval = check_interval
+        self._entries = {}
+        self._lock = threading.RLock()
+        self._versions = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.load_seconds = 0.0
+        self.last_load_seconds = {}
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key):
+        with self._lock:
+            return self._entry(key).frame.copy(deep=False)
+
+    def version(self, key):
+        # Bumped every time the frame is rebuilt in this process.
+        with self._lock:
+            return self._versions.get(key, 0)
+
+    def data_token(self, key):
+        # Digest of the source file contents behind key. Unlike version() it is identical in
+        # every worker process, so it can key caches shared between them.
+        with self._lock:
+            return self._entry(key, count=False).token
+
+    def splice(self, key, since, rows, date_col="observation_date"):
+        # Replace the cached rows dated on or after `since` with `rows` and re-stamp the sources,
+        # so an append-only update does not force a full rebuild. No-op if key is not cached.
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            start = time.perf_counter()
+            kept = entry.frame[entry.frame[date_col] < since]
+            frame = pd.concat([kept, rows], ignore_index=True).sort_values(date_col, kind="stable")
+            frame = freeze_frame(frame.reset_index(drop=True))
+            for path in self._paths(key):
+                fingerprint = file_fingerprint(path)
+                if fingerprint != entry.fingerprints[path]:
+                    entry.fingerprints[path] = fingerprint
+                    entry.hashes[path] = file_hash(path)
+            elapsed = time.perf_counter() - start
+            self.load_seconds += elapsed
+            self.last_load_seconds[key] = elapsed
+            self._versions[key] = self._versions.get(key, 0) + 1
+            self._entries[key] = _CacheEntry(frame, entry.fingerprints, entry.hashes, self._versions[key])
+            return True
+
+    def invalidate(self, key=None):
+        with self._lock:
+            keys = list(self._entries) if key is None else [key]
+            for name in keys:
+                if self._entries.pop(name, None) is not None:
+                    self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "load_seconds": self.load_seconds,
+                "last_load_seconds": dict(self.last_load_seconds),
+                "cached": sorted(self._entries)
+            }
+
+    def _entry(self, key, count=True):
+        entry = self._entries.get(key)
+        with phase(self.name, "freshness_check"):
+            fresh = entry is not None and self._is_fresh(key, entry)
+        if fresh:
+            if count:
+                self.hits += 1
+            return entry
+        if count:
+            self.misses += 1
+        return self._load(key)
+
+    def _paths(self, key):
+        return sorted(set(self.sources(key).values()))
+
+    def _is_fresh(self, key, entry):
+        now = time.monotonic()
+        if now - entry.checked_at < self.check_interval:
+            return True
+        for path in self._paths(key):
+            fingerprint = file_fingerprint(path)
+            if fingerprint == entry.fingerprints[path]:
+                continue
+            # mtime/size moved; only treat it as a change if the contents differ
+            digest = file_hash(path)
+            if digest != entry.hashes[path]:
+                self._entries.pop(key, None)
+                self.invalidations += 1
+                return False
+            entry.fingerprints[path] = fingerprint
+        entry.checked_at = now
+        return True
+
+    def _load(self, key):
+        paths = self._paths(key)
+        fingerprints = {path: file_fingerprint(path) for path in paths}
+        hashes = {path: file_hash(path) for path in paths}
+        start = time.perf_counter()
+        with phase(self.name, "load"):
+            frame = freeze_frame(self.loader(key))
+        elapsed = time.perf_counter() - start
+        self.load_seconds += elapsed
+        self.last_load_seconds[key] = elapsed
+        self._versions[key] = self._versions.get(key, 0) + 1
+        entry = _CacheEntry(frame, fingerprints, hashes, self._versions[key])
+        self._entries[key] = entry
+        return entry
+
+
+def _load_dataset(dataset_id):
+    dataset = registry.datasets[dataset_id]
+    if dataset.format == "healthcare":
+        with phase("load_county_data", "healthcare"):
+            return load_healthcare_by_date(dataset.path)
+    with phase("load_county_data", "read_csv"):
+        return load_csv(dataset.path)
+
+
+def _dataset_sources(dataset_id):
+    if dataset_id not in registry.datasets:
+        raise ValueError(f"Unknown dataset: {dataset_id}")
+    return {"file": registry.datasets[dataset_id].path}
+
+
+# Parsed on first use and shared by every county (and raw table) that references the dataset
+dataset_cache = FrameCache(_load_dataset, _dataset_sources, name="dataset")
+
+
+def load_dataset(dataset_id):
+    return dataset_cache.get(dataset_id)
+
+
+county_cache = FrameCache(build_county_data, county_sources, name="county")
+
+
+def load_county_data(county):
+    return county_cache.get(county)
+
+
+@functools.lru_cache(maxsize=32)
+def _yearly_rollup(county, data_token):
+    return yearly_rollup(load_county_data(county))
+
+
+def load_yearly_rollup(county):
+    # Per-year aggregates of the county frame, rebuilt whenever its data token changes
+    return _yearly_rollup(county, county_cache.data_token(county))
+
+
+def refresh_county_data(changed):
+    # changed: {source path: earliest new observation date}. Rebuilds only the affected rows of
+    # the affected counties this process has cached and splices them in. Only the process that
+    # appended can splice; other processes (gunicorn workers beside the `ingest.py --watch`
+    # process) see the changed source files and rebuild those counties in full.
+    for dataset_id, dataset in registry.datasets.items():
+        if dataset.path in changed:
+            dataset_cache.invalidate(dataset_id)
+    refreshed = {}
+    for county in registry.counties:
+        dates = [since for path, since in changed.items() if path in county_sources(county).values()]
+        if not dates or county not in county_cache:
+            continue
+        since = min(dates)
+        rows = build_county_data(county, since=since)
+        if county_cache.splice(county, since, rows):
+            refreshed[county] = len(rows)
+            load_yearly_rollup(county)
+    return refreshed
+
+
+def cache_stats():
+    return county_cache.stats()
@@ -1,108 +1,58 @@
+import functools
+import os
+
 import dash
 import dash_bootstrap_components as dbc
 from dash import dcc, html, dash_table
-from dash.dependencies import Input, Output, State
+from dash.dependencies import Input, Output, State, ALL, MATCH, ClientsideFunction
+from dash.exceptions import PreventUpdate
 import plotly.graph_objs as go
+import numpy as np
 import pandas as pd
 
+from affordability import TERMS, load_cube
 from cards import (info_card, county_card, career_card, buttons_card, salary_slider_card)
-from variables_and_helper_methods import (monthly_mortgage, monthly_gas_cost,
-                                          monthly_elec_cost, monthly_healthcare_cost, load_csv)
-
-# Create the app variable
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.LUMEN])
-
-# =============================================================================
-# Job Salary Data (2020 to 2023)
-# =============================================================================
-job_salary_data = {
-    "Data Scientist": {2020: 136000, 2021: 136000, 2022: 140000, 2023: 128000},
-    "Web Developer": {2020: 104000, 2021: 105000, 2022: 101000, 2023: 99000},
-    "Full Stack Developer": {2020: 105000, 2021: 119000, 2022: 105000, 2023: 137000},
-    "Data Analyst": {2020: 82000, 2021: 88000, 2022: 94000, 2023: 100000},
-    "Computer Systems Analyst": {2020: 93000, 2021: 98000, 2022: 93000, 2023: 103000}
-}
-
-
-# =============================================================================
-# CSV Paths
-# =============================================================================
-
-PATH_MEDIAN_INCOME_LA = r"data\median_income\median_income_LA_county.csv"
-PATH_MEDIAN_INCOME_OC = r"data\median_income\median_income_OC.csv"
-PATH_MEDIAN_INCOME_VC = r"data\median_income\median_income_ventura_county.csv"
-
-PATH_LISTING_LA = r"data\housing\avg_house_listing_price_LA_county.csv"
-PATH_LISTING_OC = r"data\housing\avg_house_listing_price_OC.csv"
-PATH_LISTING_VC = r"data\housing\avg_housing_listing_ventura_county.csv"
-
-PATH_ELEC_LA = r"data\household_goods_services_etc\electricity\avg_elec_price_LA_LB_ANHM.csv"
-PATH_GAS_LA = r"data\household_goods_services_etc\gas\avg_price_gas_LA_LB_ANHM_reg.csv"
-
-PATH_HEALTHCARE = r"data\household_goods_services_etc\healthcare\healthcare_dataset.csv"
-
-
-def load_county_data(county):
-    if county == "LA":
-        income_df = load_csv(PATH_MEDIAN_INCOME_LA)
-        listing_df = load_csv(PATH_LISTING_LA)
-        elec_df = load_csv(PATH_ELEC_LA)
-        gas_df = load_csv(PATH_GAS_LA)
-    elif county == "OC":
-        income_df = load_csv(PATH_MEDIAN_INCOME_OC)
-        listing_df = load_csv(PATH_LISTING_OC)
-        elec_df = load_csv(PATH_ELEC_LA)  # fallback to LA
-        gas_df = load_csv(PATH_GAS_LA)
-    elif county == "Ventura":
-        income_df = load_csv(PATH_MEDIAN_INCOME_VC)
-        listing_df = load_csv(PATH_LISTING_VC)
-        elec_df = load_csv(PATH_ELEC_LA)  # fallback to LA
-        gas_df = load_csv(PATH_GAS_LA)
-    else:
-        raise ValueError(f"Unknown county: {county}")
-
-    # Load healthcare data, rename columns, and average duplicate dates
-    healthcare_df = pd.read_csv(PATH_HEALTHCARE)
-    healthcare_df.rename(
-        columns={"Discharge Date": "observation_date", "Billing Amount": "healthcare_cost"},
-        inplace=True
-    )
-    healthcare_df["observation_date"] = pd.to_datetime(healthcare_df["observation_date"])
-    healthcare_df = healthcare_df.groupby("observation_date", as_index=False).agg({"healthcare_cost": "mean"})
-
-    # Merge datasets on observation_date (inner join ensures common dates)
-    df = pd.merge(income_df, listing_df, on="observation_date", how="inner")
-    df = pd.merge(df, elec_df, on="observation_date", how="inner")
-    df = pd.merge(df, gas_df, on="observation_date", how="inner")
-    df = pd.merge(df, healthcare_df, on="observation_date", how="inner")
-
-    # Convert monthly values to annual by multiplying by 12
-    df["annual_mortgage"] = monthly_mortgage(df["listing_price"]) * 12
-    df["annual_gas"] = monthly_gas_cost(df["gas_price"]) * 12
-    df["annual_elec"] = monthly_elec_cost(df["elec_price"]) * 12
-    df["annual_healthcare"] = monthly_healthcare_cost(df["healthcare_cost"]) * 12
-
-    df = df[[
-        "observation_date",
-        "median_income",  # assumed annual
-        "annual_mortgage",
-        "annual_gas",
-        "annual_elec",
-        "annual_healthcare"
-    ]].copy()
-    df.sort_values("observation_date", inplace=True)
-    return df
-
-
-def create_data_card(title, df):
+from comparison import METRICS, affordability_summary, add_affordability, comparison_cache, load_all_counties
+from cost_model import EXPENSE_COLUMNS, combined_expenses, format_currency, observation_years
+from downsample import downsample_indices
+from county_data import load_county_data, load_dataset, load_yearly_rollup, county_cache
+from datasets import registry
+from figure_cache import figure_cache, figure_key
+from ingest import DropDirWatcher
+from jobs import LocalJobManager, background_manager
+import metrics
+from raw_data import RAW_TABLES, load_raw_table, raw_table_cache, table_columns, query_table
+from salary_store import career_options, salary_store
+from simulation import ASSET_COLUMNS, PERCENTILES, load_historic, simulate
+
+# Create the app variable; heavy callbacks run as background jobs (see jobs.py)
+job_manager = background_manager()
+# Tabs other than Play are rendered on first visit (render_tab), so their ids are not in the initial layout
+app = dash.Dash(__name__, external_stylesheets=[dbc.themes.LUMEN], background_callback_manager=job_manager,
+                suppress_callback_exceptions=True)
+metrics.install(app.server)
+# WSGI entry point: gunicorn dashboard:server (see gunicorn.conf.py)
+server = app.server
+
+
+def create_data_card(table):
+    # Only the column headers go into the layout; rows are served page by page from update_raw_table.
     return dbc.Card(
         [
-            dbc.CardHeader(title),
+            dbc.CardHeader(table["title"]),
             dbc.CardBody(
                 dash_table.DataTable(
-                    columns=[{"name": col, "id": col} for col in df.columns],
-                    data=df.to_dict("records"),
+                    id={"type": "raw_table", "index": table["id"]},
+                    columns=table_columns(load_raw_table(table["id"])),
+                    data=[],
+                    page_current=0,
                     page_size=5,
+                    page_action="custom",
+                    sort_action="custom",
+                    sort_mode="single",
+                    sort_by=[],
+                    filter_action="custom",
+                    filter_query="",
                     style_table={"overflowX": "auto"}
                 )
             )
@@ -134,6 +84,14 @@ yearly_bar_card = dbc.Card(
                     marks=year_marks,
                     className="mb-3"
                 ),
+                dcc.Dropdown(
+                    id="compare_years",
+                    options=[{"label": str(year), "value": year} for year in range(min_year, max_year + 1)],
+                    value=[],
+                    multi=True,
+                    placeholder="Or compare several years",
+                    className="mb-3"
+                ),
                 dcc.Graph(id="bar_graph", style={"height": "50vh"})
             ]
         )
@@ -142,6 +100,158 @@ yearly_bar_card = dbc.Card(
 )
 
 
+# =============================================================================
+# County Comparison
+# =============================================================================
+
+compare_card = dbc.Card(
+    [
+        dbc.CardHeader("County Comparison"),
+        dbc.CardBody(
+            [
+                dcc.RadioItems(
+                    id="compare_metric",
+                    options=[{"label": label, "value": metric} for metric, label in METRICS.items()],
+                    value="expense_share",
+                    labelStyle={"display": "block"},
+                    className="mb-3"
+                ),
+                dcc.Graph(id="compare_graph", style={"height": "60vh"}),
+                html.Div(id="compare_summary", className="mt-3")
+            ]
+        )
+    ],
+    className="mt-4"
+)
+
+
+# =============================================================================
+# Savings Simulation
+# =============================================================================
+
+DEFAULT_ALLOCATION = {"S&P 500": 60, "10yr T.Bond": 30, "Baa Corp Bond": 10, "3-mon T.Bill": 0}
+
+allocation_card = dbc.Card(
+    [
+        dbc.CardHeader("Asset Allocation (%)"),
+        dbc.CardBody(
+            [
+                html.Div(
+                    [
+                        html.Label(label),
+                        dcc.Slider(
+                            id={"type": "sim_weight", "index": column},
+                            min=0,
+                            max=100,
+                            step=5,
+                            value=DEFAULT_ALLOCATION[column],
+                            marks={0: "0", 50: "50", 100: "100"}
+                        )
+                    ],
+                    className="mb-2"
+                )
+                for column, label in ASSET_COLUMNS.items()
+            ] + [
+                html.Small("Annual returns 1928 onward: Historical Returns on Stocks, Bonds and Bills, "
+                           "NYU Stern School of Business", className="text-muted")
+            ]
+        )
+    ],
+    className="mt-4"
+)
+
+simulation_options_card = dbc.Card(
+    [
+        dbc.CardHeader("Simulation"),
+        dbc.CardBody(
+            [
+                html.Label("Years"),
+                dcc.Slider(id="sim_years", min=5, max=40, step=5, value=30,
+                           marks={year: str(year) for year in range(5, 41, 5)}, className="mb-3"),
+                html.Label("Simulated paths"),
+                dcc.Dropdown(
+                    id="sim_paths",
+                    options=[{"label": f"{paths:,}", "value": paths} for paths in [10000, 20000, 50000, 100000]],
+                    value=20000,
+                    clearable=False,
+                    className="mb-3"
+                ),
+                dcc.Checklist(
+                    id="sim_real",
+                    options=[{"label": " Adjust for inflation", "value": "real"}],
+                    value=["real"]
+                )
+            ]
+        )
+    ],
+    className="mt-4"
+)
+
+simulation_tab = dbc.Container(
+    [
+        dbc.Row(
+            [
+                dbc.Col([allocation_card, simulation_options_card], width=3),
+                dbc.Col(
+                    [
+                        dbc.Progress(id="sim_progress", value=0, striped=True, animated=True,
+                                     style={"display": "none"}, className="mb-2"),
+                        dcc.Graph(id="simulation_graph", style={"height": "60vh"}),
+                        html.Div(id="simulation_summary", className="text-muted")
+                    ],
+                    width=9,
+                    className="mt-4"
+                )
+            ]
+        )
+    ],
+    fluid=True
+)
+
+
+# =============================================================================
+# What-if Affordability Surface
+# =============================================================================
+
+whatif_card = dbc.Card(
+    [
+        dbc.CardHeader("What If: Mortgage Assumptions"),
+        dbc.CardBody(
+            [
+                dbc.Row(
+                    [
+                        dbc.Col(
+                            [
+                                html.Label("Loan term (years)"),
+                                dcc.RadioItems(
+                                    id="whatif_term",
+                                    options=[{"label": f" {term}", "value": int(term)} for term in TERMS],
+                                    value=30,
+                                    inline=True,
+                                    inputStyle={"margin-left": "10px"}
+                                )
+                            ],
+                            width=3
+                        ),
+                        dbc.Col(
+                            [
+                                html.Label("Year"),
+                                dcc.Slider(id="whatif_year", min=min_year, max=max_year, step=1, value=max_year,
+                                           marks=year_marks)
+                            ],
+                            width=9
+                        )
+                    ],
+                    className="mb-3"
+                ),
+                dcc.Graph(id="whatif_heatmap", style={"height": "60vh"})
+            ]
+        )
+    ],
+    className="mt-4"
+)
+
+
 # =============================================================================
 # Define Tabs for the App
 # =============================================================================
@@ -157,11 +267,22 @@ learn_card = dbc.Card(
                 to explore these trends across different counties.
 
                 **How to Use:**
-                - In the **Play** tab, use the controls to select a county and adjust your salary (or choose a career).
-                - Click **Combine Expenses** to see a single trace of combined expenses along with the selected salary.
-                  In this mode, the y‑axis will use the natural data range (e.g. starting around 30k).
-                - Click **Reset Graph** to return to the individual expense view, forcing the y‑axis to start at 0.
-                - The **Yearly Summary** shows a bar graph for a selected year, comparing data salary, user-selected salary, and combined expenses.
+                - In the **Play** tab, use the controls to select a county and adjust your salary
+                  (or choose a career).
+                - Click **Combine Expenses** to see a single trace of combined expenses along with the
+                  selected salary. In this mode, the y‑axis will use the natural data range
+                  (e.g. starting around 30k).
+                - Click **Reset Graph** to return to the individual expense view, forcing the y‑axis
+                  to start at 0.
+                - The **Yearly Summary** shows a bar graph for a selected year, comparing data salary,
+                  user-selected salary, and combined expenses. Pick several years in the dropdown below
+                  the slider to compare them side by side.
+                - In the **Simulate** tab, project what you could save each year (your salary minus the
+                  county's combined expenses) by replaying historical stock, bond and bill returns
+                  (1928 onward) under an asset allocation of your choice.
+                - In the **What If** tab, see how combined expenses compare with your salary across mortgage rates,
+                  down payments and loan terms.
+                - In the **Compare** tab, view an affordability metric for every county side by side.
                 - In the **Raw Data** tab, view the source datasets.
                 """
             )
@@ -198,45 +319,65 @@ play_tab = dbc.Container(
     fluid=True
 )
 
-raw_data_card = dbc.Card(
-    [
-        dbc.CardHeader("Raw Data"),
-        dbc.CardBody(
-            html.Div(
-                [
-                    create_data_card("Median Income - Los Angeles County", load_csv(PATH_MEDIAN_INCOME_LA)),
-                    create_data_card("Median Income - Orange County", load_csv(PATH_MEDIAN_INCOME_OC)),
-                    create_data_card("Median Income - Ventura County", load_csv(PATH_MEDIAN_INCOME_VC)),
-                    create_data_card("House Listing Price - Los Angeles County", load_csv(PATH_LISTING_LA)),
-                    create_data_card("House Listing Price - Orange County", load_csv(PATH_LISTING_OC)),
-                    create_data_card("House Listing Price - Ventura County", load_csv(PATH_LISTING_VC)),
-                    create_data_card("Electricity Price - LA", load_csv(PATH_ELEC_LA)),
-                    create_data_card("Gas Price - LA", load_csv(PATH_GAS_LA)),
-                    create_data_card("Healthcare Dataset", pd.read_csv(PATH_HEALTHCARE))
-                ]
+
+@functools.lru_cache(maxsize=4)
+def build_raw_data_card(data_tokens):
+    # Rebuilt only when a raw table's data changes (its columns may have)
+    return dbc.Card(
+        [
+            dbc.CardHeader("Raw Data"),
+            dbc.CardBody(
+                html.Div(
+                    [
+                        create_data_card(table) for table in RAW_TABLES
+                    ]
+                )
             )
-        )
-    ],
-    className="mt-4"
-)
+        ],
+        className="mt-4"
+    )
+
+
+# Content of the lazily rendered tabs. The Play tab is always in the layout: the other tabs'
+# callbacks read its county and salary controls.
+LAZY_TABS = {
+    "tab1": lambda: learn_card,
+    "tab3": lambda: build_raw_data_card(tuple(raw_table_cache.data_token(table["id"]) for table in RAW_TABLES)),
+    "tab4": lambda: compare_card,
+    "tab5": lambda: simulation_tab,
+    "tab6": lambda: whatif_card
+}
+HIDDEN = {"display": "none"}
 
 tabs = dbc.Tabs(
     [
-        dbc.Tab(learn_card, tab_id="tab1", label="Learn"),
-        dbc.Tab(play_tab, tab_id="tab2", label="Play"),
-        dbc.Tab(raw_data_card, tab_id="tab3", label="Raw Data"),
+        dbc.Tab(tab_id="tab1", label="Learn"),
+        dbc.Tab(tab_id="tab2", label="Play"),
+        dbc.Tab(tab_id="tab3", label="Raw Data"),
+        dbc.Tab(tab_id="tab4", label="Compare"),
+        dbc.Tab(tab_id="tab5", label="Simulate"),
+        dbc.Tab(tab_id="tab6", label="What If"),
     ],
     id="tabs",
     active_tab="tab2",
     className="mt-2"
 )
 
+tab_panes = html.Div(
+    [html.Div(play_tab, id="play_pane")] +
+    [html.Div(id={"type": "tab_pane", "index": tab_id}, style=HIDDEN) for tab_id in LAZY_TABS]
+)
+
 # =============================================================================
 # Main Layout
 # =============================================================================
 app.layout = dbc.Container(
     [
         dcc.Store(id="mode_store", data="individual"),
+        dcc.Store(id="county_series_store"),
+        dcc.Store(id="cost_graph_width"),
+        dcc.Store(id="career_salary_store"),
+        dcc.Store(id="rendered_tabs", data=[]),
         dbc.Row(
             dbc.Col(
                 [
@@ -246,7 +387,7 @@ app.layout = dbc.Container(
             )
         ),
         dbc.Row(
-            dbc.Col(tabs, width=12, className="mt-4")
+            dbc.Col([tabs, tab_panes], width=12, className="mt-4")
         ),
         # Footer row
         dbc.Row(
@@ -267,134 +408,141 @@ app.layout = dbc.Container(
 # Callbacks
 # =============================================================================
 
-# Synchronize salary slider and career dropdown:
+# Render a tab the first time it is opened and show only the active one:
 @app.callback(
+    [Output("play_pane", "style"),
+     Output({"type": "tab_pane", "index": ALL}, "children"),
+     Output({"type": "tab_pane", "index": ALL}, "style"),
+     Output("rendered_tabs", "data")],
+    Input("tabs", "active_tab"),
+    State("rendered_tabs", "data")
+)
+@metrics.instrument("render_tab")
+def render_tab(active_tab, rendered):
+    rendered = list(rendered or [])
+    children = []
+    styles = []
+    for output in dash.callback_context.outputs_list[1]:
+        tab_id = output["id"]["index"]
+        if tab_id == active_tab and tab_id not in rendered:
+            children.append(LAZY_TABS[tab_id]())
+            rendered.append(tab_id)
+        else:
+            children.append(dash.no_update)
+        styles.append(None if tab_id == active_tab else HIDDEN)
+    return (None if active_tab == "tab2" else HIDDEN), children, styles, rendered
+
+
+# Synchronize salary slider and career dropdown (runs in the browser, see assets/clientside.js):
+app.clientside_callback(
+    ClientsideFunction(namespace="cost_graph", function_name="sync_salary"),
     [Output("salary_slider", "value"), Output("career_dropdown", "value")],
     [Input("salary_slider", "value"), Input("career_dropdown", "value")],
     prevent_initial_call=True
 )
-def sync_salary(slider_val, dropdown_val):
-    ctx = dash.callback_context
-    if not ctx.triggered:
-        raise dash.exceptions.PreventUpdate
-    triggered_id = ctx.triggered[0]["prop_id"].split('.')[0]
-    if triggered_id == "salary_slider":
-        return slider_val, None
-    elif triggered_id == "career_dropdown":
-        return 0, dropdown_val
-    else:
-        raise dash.exceptions.PreventUpdate
 
 
-# Update graph mode (combined vs. individual) based on button clicks:
+# Search the careers on the server, so only the matches are sent to the dropdown:
 @app.callback(
+    Output("career_dropdown", "options"),
+    Input("career_dropdown", "search_value"),
+    State("career_dropdown", "value"),
+    prevent_initial_call=True
+)
+@metrics.instrument("update_career_options")
+def update_career_options(search_value, value):
+    if not search_value:
+        raise PreventUpdate
+    careers = salary_store.search(search_value)
+    # Keep the selected career listed, or the dropdown would show it as blank
+    if value is not None and value not in careers:
+        careers.append(value)
+    return career_options(careers)
+
+
+# Update graph mode (combined vs. individual) based on button clicks:
+app.clientside_callback(
+    ClientsideFunction(namespace="cost_graph", function_name="update_mode"),
     Output("mode_store", "data"),
     [Input("combine_button", "n_clicks"), Input("reset_button", "n_clicks")],
     State("mode_store", "data")
 )
-def update_mode(combine_n, reset_n, current_mode):
-    ctx = dash.callback_context
-    if not ctx.triggered:
-        return current_mode or "individual"
-    button_id = ctx.triggered[0]["prop_id"].split(".")[0]
-    if button_id == "combine_button":
-        return "combined"
-    elif button_id == "reset_button":
-        return "individual"
-    return current_mode
-
-
-# Update the main cost graph (line graph):
-@app.callback(
-    Output("cost_graph", "figure"),
-    [Input("county_radio", "value"),
-     Input("salary_slider", "value"),
-     Input("career_dropdown", "value"),
-     Input("mode_store", "data")]
-)
-def update_line_graph(county, slider_salary, dropdown_val, mode):
-    df = load_county_data(county)
-    ctx = dash.callback_context
 
-    # Determine the user's salary series: if a career is selected, build a time series; else, constant.
-    if dropdown_val is not None:
-        # Build a time series for the selected job using job_salary_data
-        user_salary_series = []
-        for date in df["observation_date"]:
-            year = date.year
-            salary = job_salary_data[dropdown_val].get(year, job_salary_data[dropdown_val][2023])
-            user_salary_series.append(salary)
-    else:
-        user_salary_series = [slider_salary] * len(df["observation_date"])
 
-    # For the constant average in combined mode (if no dropdown), compute the average:
-    avg_salary = sum(user_salary_series) / len(user_salary_series)
+# =============================================================================
+# Figure Builders
+# =============================================================================
 
-    fig = go.Figure()
+# Above this many points a trace is drawn with WebGL, without markers and with one hover template
+WEBGL_THRESHOLD = 1000
+# Points per series sent to the browser while the graph's pixel width is not known yet
+DEFAULT_SERIES_POINTS = 1200
 
-    def create_trace(x, y, name, line_style=dict(), mode="lines+markers", hover_format="${:,.2f}"):
-        hover_text = []
-        for val in y:
-            if pd.isna(val):
-                hover_text.append("No data for this date")
-            else:
-                hover_text.append(hover_format.format(val))
-        return go.Scatter(
+
+def create_trace(x, y, name, line_style=None, mode="lines+markers"):
+    if len(y) > WEBGL_THRESHOLD:
+        return go.Scattergl(
             x=x,
             y=y,
-            mode=mode,
+            mode="lines",
             name=name,
-            line=line_style,
-            hovertext=hover_text,
-            hoverinfo="text+x"
+            line=line_style or {},
+            hovertemplate="%{y:$,.2f}"
         )
+    return go.Scatter(
+        x=x,
+        y=y,
+        mode=mode,
+        name=name,
+        line=line_style or {},
+        hovertext=format_currency(y),
+        hoverinfo="text+x"
+    )
+
+
+def salary_values(df, slider_salary, dropdown_val):
+    # If a career is selected, build a time series from the salary store; else, constant.
+    if dropdown_val is not None:
+        return salary_store.series(dropdown_val, observation_years(df["observation_date"]))
+    return np.full(len(df), slider_salary, dtype=float)
+
+
+def build_line_figure(df, county, slider_salary, dropdown_val, mode):
+    dates = df["observation_date"]
+    user_salary_series = salary_values(df, slider_salary, dropdown_val)
+
+    # For the constant average in combined mode (if no dropdown), compute the average:
+    avg_salary = user_salary_series.mean() if len(user_salary_series) else 0
+
+    fig = go.Figure()
 
     if mode == "combined":
-        combined_expenses = df["annual_mortgage"] + df["annual_gas"] + df["annual_elec"] + df["annual_healthcare"]
-        fig.add_trace(create_trace(df["observation_date"], combined_expenses, "Combined Expenses"))
-        fig.add_trace(create_trace(df["observation_date"], df["median_income"], "Median Income"))
-        # In combined mode, if a career is selected, show the time series; otherwise, show a constant trace.
-        if dropdown_val is not None:
-            fig.add_trace(create_trace(df["observation_date"], user_salary_series, "Selected Salary",
-                                       line_style=dict(dash="dash")))
-        else:
-            salary_x = [df["observation_date"].min(), df["observation_date"].max()]
-            salary_y = [slider_salary, slider_salary]
-            fig.add_trace(go.Scatter(
-                x=salary_x,
-                y=salary_y,
-                mode="lines",
-                name="Selected Salary",
-                line=dict(dash="dash"),
-                hovertemplate="Salary: ${:,.2f}".format(slider_salary)
-            ))
-        # In combined mode, let y-axis auto-scale (it may start near 30k)
+        fig.add_trace(create_trace(dates, combined_expenses(df), "Combined Expenses"))
+        fig.add_trace(create_trace(dates, df["median_income"], "Median Income"))
     else:
-        fig.add_trace(create_trace(df["observation_date"], df["annual_mortgage"], "Annual Mortgage"))
-        fig.add_trace(create_trace(df["observation_date"], df["annual_gas"], "Annual Gas"))
-        fig.add_trace(create_trace(df["observation_date"], df["annual_elec"], "Annual Electricity"))
-        fig.add_trace(create_trace(df["observation_date"], df["annual_healthcare"], "Annual Healthcare"))
-        fig.add_trace(create_trace(df["observation_date"], df["median_income"], "Median Income"))
-        if dropdown_val is not None:
-            fig.add_trace(create_trace(df["observation_date"], user_salary_series, "Selected Salary",
-                                       line_style=dict(dash="dash")))
-        else:
-            salary_x = [df["observation_date"].min(), df["observation_date"].max()]
-            salary_y = [slider_salary, slider_salary]
-            fig.add_trace(go.Scatter(
-                x=salary_x,
-                y=salary_y,
-                mode="lines",
-                name="Selected Salary",
-                line=dict(dash="dash"),
-                hovertemplate="Salary: ${:,.2f}".format(slider_salary)
-            ))
+        fig.add_trace(create_trace(dates, df["annual_mortgage"], "Annual Mortgage"))
+        fig.add_trace(create_trace(dates, df["annual_gas"], "Annual Gas"))
+        fig.add_trace(create_trace(dates, df["annual_elec"], "Annual Electricity"))
+        fig.add_trace(create_trace(dates, df["annual_healthcare"], "Annual Healthcare"))
+        fig.add_trace(create_trace(dates, df["median_income"], "Median Income"))
+
+    # If a career is selected, show the time series; otherwise, show a constant trace.
+    if dropdown_val is not None:
+        fig.add_trace(create_trace(dates, user_salary_series, "Selected Salary", line_style=dict(dash="dash")))
+    else:
+        fig.add_trace(go.Scatter(
+            x=[dates.min(), dates.max()],
+            y=[slider_salary, slider_salary],
+            mode="lines",
+            name="Selected Salary",
+            line=dict(dash="dash"),
+            hovertemplate="Salary: ${:,.2f}".format(slider_salary)
+        ))
+
+    # In combined mode, let y-axis auto-scale (it may start near 30k)
+    if mode != "combined":
         max_val = max(
-            df["annual_mortgage"].max(),
-            df["annual_gas"].max(),
-            df["annual_elec"].max(),
-            df["annual_healthcare"].max(),
-            df["median_income"].max(),
+            np.nanmax(df[EXPENSE_COLUMNS + ["median_income"]].to_numpy(dtype=float), initial=0),
             avg_salary
         )
         fig.update_layout(yaxis_range=[0, max_val * 1.1])
@@ -404,49 +552,403 @@ def update_line_graph(county, slider_salary, dropdown_val, mode):
         xaxis=dict(title="Date", tickformat="%b %d, %Y", tickmode="auto"),
         yaxis_title="Annual Amount (USD)",
         legend=dict(x=0, y=1.05, orientation="h"),
+        hovermode="closest",
+        uirevision=county
+    )
+    return fig
+
+
+def yearly_values(rollup, slider_salary, dropdown_val, year):
+    # Median salary, user salary and combined expenses for one year, looked up in the rollup
+    user_salary = salary_store.salary(dropdown_val, year) if dropdown_val is not None else slider_salary
+    if year not in rollup.index:
+        return [0, user_salary, 0]
+    row = rollup.loc[year]
+    return [row["median_income"], user_salary, row["combined_expenses"]]
+
+
+def build_bar_figure(rollup, slider_salary, dropdown_val, selected_years):
+    if dropdown_val is not None:
+        categories = ["Median Salary", dropdown_val, "Combined Expenses"]
+    else:
+        categories = ["Median Salary", "User Selected Salary", "Combined Expenses"]
+
+    bars = []
+    for year in selected_years:
+        values = yearly_values(rollup, slider_salary, dropdown_val, year)
+        bars.append(go.Bar(
+            x=categories,
+            y=values,
+            name=str(year),
+            text=format_currency(values),
+            textposition='auto'
+        ))
+    bar_fig = go.Figure(data=bars)
+    if len(selected_years) == 1:
+        title = f"Yearly Summary for {selected_years[0]}"
+    else:
+        title = f"Yearly Summary for {', '.join(str(year) for year in selected_years)}"
+        bar_fig.update_layout(barmode="group")
+    bar_fig.update_layout(title=title,
+                          yaxis_title="Annual Amount (USD)",
+                          xaxis_title="")
+    return bar_fig
+
+
+def build_compare_figure(df, metric):
+    df = add_affordability(df)
+    fig = go.Figure()
+    for county, group in df.groupby("county", sort=False):
+        values = group[metric].to_numpy(dtype=float)
+        fig.add_trace(go.Scatter(
+            x=group["observation_date"],
+            y=values,
+            mode="lines+markers",
+            name=county,
+            hovertext=[f"{v:.1%}" for v in values] if metric.endswith("_share") else format_currency(values),
+            hoverinfo="text+x+name"
+        ))
+    fig.update_layout(
+        title=METRICS[metric],
+        xaxis=dict(title="Date", tickformat="%b %d, %Y", tickmode="auto"),
+        yaxis=dict(title="Share of Median Income", tickformat=".0%") if metric.endswith("_share")
+        else dict(title="Annual Amount (USD)"),
+        legend=dict(x=0, y=1.05, orientation="h"),
         hovermode="closest"
     )
     return fig
 
 
+def build_compare_summary(df):
+    summary = affordability_summary(df)
+    rows = [
+        html.Tr([
+            html.Td(row.county),
+            html.Td(row.observation_date.strftime("%Y-%m-%d")),
+            html.Td(format_currency([row.median_income])[0]),
+            html.Td(format_currency([row.combined_expenses])[0]),
+            html.Td(f"{row.expense_share:.1%}"),
+            html.Td(f"{row.mean_expense_share:.1%}")
+        ])
+        for row in summary.itertuples()
+    ]
+    header = html.Thead(html.Tr([html.Th(label) for label in [
+        "County", "Latest Date", "Median Income", "Combined Expenses", "Expense Share", "Average Expense Share"
+    ]]))
+    return dbc.Table([header, html.Tbody(rows)], bordered=True, size="sm")
+
+
+def build_simulation_figure(result):
+    years = result["years"]
+    bands = result["bands"]
+    fig = go.Figure()
+    # Outer band first so the inner band and the median draw on top
+    for low, high, opacity in [(PERCENTILES[0], PERCENTILES[-1], 0.15), (PERCENTILES[1], PERCENTILES[-2], 0.3)]:
+        fig.add_trace(go.Scatter(x=years, y=bands[high], mode="lines", line=dict(width=0),
+                                 showlegend=False, hoverinfo="skip"))
+        fig.add_trace(go.Scatter(
+            x=years, y=bands[low], mode="lines", line=dict(width=0), fill="tonexty",
+            fillcolor=f"rgba(31, 119, 180, {opacity})", name=f"{low}th-{high}th percentile",
+            hoverinfo="skip"
+        ))
+    median = bands[50]
+    fig.add_trace(go.Scatter(x=years, y=median, mode="lines", name="Median",
+                             hovertext=format_currency(median), hoverinfo="text+x"))
+    fig.update_layout(
+        title="Projected Savings",
+        xaxis_title="Years from Now",
+        yaxis_title="Balance (USD)",
+        legend=dict(x=0, y=1.05, orientation="h"),
+        hovermode="closest"
+    )
+    return fig
+
+
+@functools.lru_cache(maxsize=64)
+def county_series(county, data_token, start=None, end=None, points=DEFAULT_SERIES_POINTS):
+    # Base series the browser needs to draw the line graph, cached per county, data version and
+    # window. Series longer than `points` are downsampled with LTTB; a zoomed window is cut at
+    # full resolution first (plus one point past each edge so the lines reach the axis ends).
+    df = load_county_data(county)
+    dates = df["observation_date"].to_numpy()
+    lo, hi = 0, len(df)
+    if start is not None:
+        lo = max(int(np.searchsorted(dates, np.datetime64(start), side="left")) - 1, 0)
+    if end is not None:
+        hi = min(int(np.searchsorted(dates, np.datetime64(end), side="right")) + 1, len(df))
+    df = df.iloc[lo:hi]
+
+    columns = {col: df[col].to_numpy(dtype=float) for col in EXPENSE_COLUMNS + ["median_income"]}
+    columns["combined"] = combined_expenses(df)
+    keep = downsample_indices(df["observation_date"], columns.values(), points)
+    series = {
+        "county": county,
+        "dates": df["observation_date"].iloc[keep].dt.strftime("%Y-%m-%d").tolist(),
+        "window": [start, end] if start is not None or end is not None else None,
+        "total_points": len(df)
+    }
+    for col, values in columns.items():
+        series[col] = values[keep].tolist()
+    return series
+
+
+def zoom_window(relayout):
+    # (start, end) day strings of a zoomed x-axis, (None, None) when reset, None when x is untouched
+    if not relayout:
+        return None
+    if relayout.get("xaxis.autorange"):
+        return None, None
+    if "xaxis.range[0]" in relayout:
+        bounds = relayout["xaxis.range[0]"], relayout["xaxis.range[1]"]
+    elif "xaxis.range" in relayout:
+        bounds = relayout["xaxis.range"]
+    else:
+        return None
+    start, end = (pd.Timestamp(bound) for bound in bounds)
+    return str(start.floor("D").date()), str(end.ceil("D").date())
+
+
+# Ship the county's base series to the browser on a county switch, and re-fetch the zoomed
+# window at full resolution (up to the graph's pixel width) when the x-axis range changes:
+@app.callback(
+    Output("county_series_store", "data"),
+    [Input("county_radio", "value"),
+     Input("cost_graph", "relayoutData"),
+     Input("cost_graph_width", "data")],
+    State("county_series_store", "data")
+)
+@metrics.instrument("update_county_series")
+def update_county_series(county, relayout=None, width=None, current=None):
+    triggered = {item["prop_id"] for item in dash.callback_context.triggered}
+    window = None, None
+    if "county_radio.value" not in triggered:
+        if "cost_graph.relayoutData" in triggered:
+            window = zoom_window(relayout)
+            if window is None:
+                raise PreventUpdate
+        elif current and current.get("county") == county and current.get("window"):
+            window = tuple(current["window"])
+    points = int(min(max(width or DEFAULT_SERIES_POINTS, 200), 4000))
+    return county_series(county, county_cache.data_token(county), window[0], window[1], points)
+
+
+# Ship the selected career's yearly salaries to the browser for the line graph:
+@app.callback(
+    Output("career_salary_store", "data"),
+    Input("career_dropdown", "value")
+)
+@metrics.instrument("update_career_salary")
+def update_career_salary(career):
+    if career is None or career not in salary_store:
+        return None
+    return {"career": career, "first_year": salary_store.first_year, "salaries": salary_store.row(career).tolist()}
+
+
+# Measure the graph's pixel width in the browser so the server downsamples to it:
+app.clientside_callback(
+    ClientsideFunction(namespace="cost_graph", function_name="graph_width"),
+    Output("cost_graph_width", "data"),
+    Input("cost_graph", "relayoutData"),
+    State("cost_graph_width", "data")
+)
+
+
+# Update the main cost graph (line graph) in the browser from the stored series:
+app.clientside_callback(
+    ClientsideFunction(namespace="cost_graph", function_name="render"),
+    Output("cost_graph", "figure"),
+    [Input("county_series_store", "data"),
+     Input("salary_slider", "value"),
+     Input("career_dropdown", "value"),
+     Input("mode_store", "data"),
+     Input("career_salary_store", "data")]
+)
+
+
+def figure_data_token(county, career):
+    # The county's data plus, when a career is picked, the wage table its salaries come from
+    token = county_cache.data_token(county)
+    return token if career is None else f"{token}:{salary_store.token}"
+
+
+# Server-side render of the same line graph, for exports and benchmarks:
+@metrics.instrument("update_line_graph")
+def update_line_graph(county, slider_salary, dropdown_val, mode):
+    key = figure_key("line", county, figure_data_token(county, dropdown_val), slider_salary, dropdown_val,
+                     mode=mode)
+    return figure_cache.get_or_build(
+        key, lambda: build_line_figure(load_county_data(county), county, slider_salary, dropdown_val, mode)
+    )
+
+
 # Update the bar graph (yearly summary visualization):
 @app.callback(
     Output("bar_graph", "figure"),
     [Input("county_radio", "value"),
      Input("salary_slider", "value"),
      Input("career_dropdown", "value"),
-     Input("year_slider", "value")]
+     Input("year_slider", "value"),
+     Input("compare_years", "value")]
 )
-def update_bar_graph(county, slider_salary, dropdown_val, selected_year):
-    df = load_county_data(county)
-    ctx = dash.callback_context
-    if dropdown_val is not None:
-        user_salary = job_salary_data[dropdown_val].get(selected_year, job_salary_data[dropdown_val][2023])
-        categories = ["Median Salary", dropdown_val, "Combined Expenses"]
+@metrics.instrument("update_bar_graph")
+def update_bar_graph(county, slider_salary, dropdown_val, selected_year, compare_years=None):
+    selected_years = sorted({int(year) for year in compare_years}) if compare_years else [int(selected_year)]
+    key = figure_key("bar", county, figure_data_token(county, dropdown_val), slider_salary, dropdown_val,
+                     year=selected_years)
+    return figure_cache.get_or_build(
+        key, lambda: build_bar_figure(load_yearly_rollup(county), slider_salary, dropdown_val, selected_years)
+    )
+
+
+# Compare every county at once from the batch frame:
+@app.callback(
+    [Output("compare_graph", "figure"),
+     Output("compare_summary", "children")],
+    Input("compare_metric", "value"),
+    background=True,
+    interval=250
+)
+@metrics.instrument("update_compare_graph")
+def update_compare_graph(metric):
+    token = comparison_cache.data_token("all")
+    df = load_all_counties()
+    figure = figure_cache.get_or_build(figure_key("compare", "all", token, mode=metric),
+                                       lambda: build_compare_figure(df, metric))
+    return figure, build_compare_summary(df)
 
-    else:
-        user_salary = slider_salary
-        categories = ["Median Salary", "User Selected Salary", "Combined Expenses"]
 
-    df_year = df[df["observation_date"].dt.year == selected_year]
-    if df_year.empty:
-        data_salary = 0
-        combined_expenses = 0
+# Project the yearly surplus with the Monte Carlo simulator:
+@app.callback(
+    [Output("simulation_graph", "figure"),
+     Output("simulation_summary", "children")],
+    [Input("county_radio", "value"),
+     Input("salary_slider", "value"),
+     Input("career_dropdown", "value"),
+     Input({"type": "sim_weight", "index": ALL}, "value"),
+     Input("sim_years", "value"),
+     Input("sim_paths", "value"),
+     Input("sim_real", "value")],
+    background=True,
+    progress=[Output("sim_progress", "value"), Output("sim_progress", "label")],
+    running=[(Output("sim_progress", "style"), {"display": "flex"}, {"display": "none"})],
+    interval=250
+)
+@metrics.instrument("update_simulation")
+def update_simulation(set_progress, county, slider_salary, dropdown_val, weights, years, paths, real):
+    df = load_county_data(county)
+    latest_year = int(observation_years(df["observation_date"])[-1])
+    salary = salary_store.salary(dropdown_val, latest_year) if dropdown_val is not None else slider_salary
+    surplus = float(salary - combined_expenses(df)[-1])
+    # A deficit is not invested, so it contributes nothing rather than a negative balance
+    contribution = max(surplus, 0.0)
+    if not any(weights):
+        weights = list(DEFAULT_ALLOCATION.values())
+    set_progress((0, ""))
+    result = simulate(contribution, weights, years=years, n_paths=paths, seed=0, real="real" in (real or []),
+                      progress=lambda done: set_progress((round(done * 100), f"{done:.0%}")))
+    if surplus <= 0:
+        summary = (f"No savings: {county} combined expenses in {latest_year} exceed the salary by "
+                   f"{format_currency([-surplus])[0]} a year, so nothing is invested and the projection stays "
+                   f"at $0.00. The deficit is not modeled as debt.")
     else:
-        data_salary = df_year["median_income"].mean()
-        combined_expenses = (df_year["annual_mortgage"] + df_year["annual_gas"] +
-                             df_year["annual_elec"] + df_year["annual_healthcare"]).mean()
-    values = [data_salary, user_salary, combined_expenses]
-    bar_fig = go.Figure(data=[go.Bar(
-        x=categories,
-        y=values,
-        text=[f"${v:,.2f}" for v in values],
-        textposition='auto'
-    )])
-    bar_fig.update_layout(title=f"Yearly Summary for {selected_year}",
-                          yaxis_title="Annual Amount (USD)",
-                          xaxis_title="")
-    return bar_fig
+        summary = (f"Saving {format_currency([surplus])[0]} a year (salary minus {county} combined expenses in "
+                   f"{latest_year}) over {paths:,} simulated paths. "
+                   f"Median after {years} years: {format_currency([result['bands'][50][-1]])[0]}.")
+    return build_simulation_figure(result), summary
+
+
+# Slice the precomputed affordability cube for the selected county, salary, term and year:
+@app.callback(
+    Output("whatif_heatmap", "figure"),
+    [Input("county_radio", "value"),
+     Input("salary_slider", "value"),
+     Input("career_dropdown", "value"),
+     Input("whatif_term", "value"),
+     Input("whatif_year", "value")]
+)
+@metrics.instrument("update_whatif_heatmap")
+def update_whatif_heatmap(county, slider_salary, dropdown_val, term, year):
+    cube = load_cube()
+    salary = salary_store.salary(dropdown_val, year) if dropdown_val is not None else slider_salary
+    grid_salary = cube.salaries[cube.nearest(cube.salaries, salary)]
+    shares = cube.surface(county, salary, term, year)
+    observed = cube.dates[cube.row_for(county, year)]
+    fig = go.Figure(data=go.Heatmap(
+        x=[f"{rate:.2%}" for rate in cube.rates],
+        y=[f"{down:.1%}" for down in cube.down_payments],
+        z=shares.T,
+        colorscale="RdYlGn_r",
+        zmin=0,
+        zmax=max(1.5, float(np.nanmax(shares))),
+        text=[[f"{share:.0%}" for share in row] for row in shares.T],
+        texttemplate="%{text}",
+        hovertemplate="Rate %{x}<br>Down payment %{y}<br>Expenses / salary %{text}<extra></extra>",
+        colorbar=dict(title="Expenses / Salary", tickformat=".0%")
+    ))
+    fig.update_layout(
+        title=f"Combined Expenses / {format_currency([grid_salary])[0]} Salary in {county} County "
+              f"({term}-year loan, {str(observed)})",
+        xaxis_title="Mortgage Rate",
+        yaxis_title="Down Payment"
+    )
+    return fig
+
+
+# Serve one page of a Raw Data table (filtered and sorted on the server):
+@app.callback(
+    [Output({"type": "raw_table", "index": MATCH}, "data"),
+     Output({"type": "raw_table", "index": MATCH}, "page_count")],
+    [Input({"type": "raw_table", "index": MATCH}, "page_current"),
+     Input({"type": "raw_table", "index": MATCH}, "page_size"),
+     Input({"type": "raw_table", "index": MATCH}, "sort_by"),
+     Input({"type": "raw_table", "index": MATCH}, "filter_query")]
+)
+@metrics.instrument("update_raw_table")
+def update_raw_table(page_current, page_size, sort_by, filter_query):
+    table_id = dash.callback_context.outputs_list[0]["id"]["index"]
+    return query_table(load_raw_table(table_id), page_current, page_size, sort_by, filter_query)
+
+
+# Cache hit rates on /metrics
+metrics.registry.register_collector(metrics.cache_collector("figure", figure_cache.stats))
+metrics.registry.register_collector(metrics.cache_collector("county", county_cache.stats))
+metrics.registry.register_collector(metrics.cache_collector("comparison", comparison_cache.stats))
+metrics.registry.register_collector(metrics.cache_collector("raw_table", raw_table_cache.stats))
+metrics.registry.register_collector(metrics.cache_collector(
+    "county_series", lambda: county_series.cache_info()._asdict()
+))
+if isinstance(job_manager, LocalJobManager):
+    metrics.registry.register_collector(metrics.cache_collector("jobs", job_manager.stats))
+# Resident, proportional and private memory of this worker
+metrics.registry.register_collector(metrics.memory_collector)
+
+
+# =============================================================================
+# Preloading & Ingestion
+# =============================================================================
+
+def preload_data():
+    # Loads everything the callbacks read, so a preloading server master (gunicorn.conf.py)
+    # holds it once and its forked workers share it
+    for dataset_id in registry.datasets:
+        load_dataset(dataset_id)
+    for county in registry.counties:
+        load_county_data(county)
+        load_yearly_rollup(county)
+    for table in RAW_TABLES:
+        load_raw_table(table["id"])
+    for render in LAZY_TABS.values():
+        render()
+    load_all_counties()
+    load_cube()
+    load_historic()
+
+
+# Optionally pick up new FRED observations from a drop directory inside the server process.
+# gunicorn.conf.py takes INGEST_DROP_DIR out of the workers' environment and runs one watcher in
+# its own process instead, so several workers never ingest the same files.
+if os.environ.get("INGEST_DROP_DIR"):
+    DropDirWatcher(os.environ["INGEST_DROP_DIR"], float(os.environ.get("INGEST_INTERVAL", 60))).start()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,107 @@
+import json
+import os
+
+import pandas as pd
+
+from snapshot import DATA_DIR
+
+# =============================================================================
+# Dataset Registry
+# =============================================================================
+# Every series the dashboard reads is declared in data/manifest.json (DATASET_MANIFEST points
+# elsewhere): its file relative to the manifest, value column, frequency, unit, region and, for
+# FRED series, the FRED id ingest.py appends under. Counties map each series kind (income,
+# listing, elec, gas, healthcare) to a dataset id and may name a fallback county whose datasets
+# fill in the kinds they leave out, the way OC and Ventura use the LA electricity and gas
+# series. A new county or series is a manifest entry, not code. The "salaries" entry names the
+# occupation wage table behind the career dropdown (see salary_store.py).
+
+MANIFEST_PATH = os.environ.get("DATASET_MANIFEST", os.path.join(DATA_DIR, "manifest.json"))
+
+# How old the latest observation may be before a target date is dropped instead of
+# forward-filled, by dataset frequency (a dataset can override it with "max_staleness_days")
+STALENESS = {
+    "daily": pd.Timedelta(days=31),
+    "monthly": pd.Timedelta(days=62),
+    "quarterly": pd.Timedelta(days=123),
+    "annual": pd.Timedelta(days=366)
+}
+
+# "fred": observation_date,<value> CSV. "healthcare": raw Kaggle rows, averaged per discharge date.
+FORMATS = ["fred", "healthcare"]
+
+
+class Dataset:
+
+    def __init__(self, dataset_id, spec, root):
+        self.id = dataset_id
+        self.title = spec.get("title", dataset_id)
+        self.path = os.path.join(root, *spec["path"].split("/"))
+        self.format = spec.get("format", "fred")
+        self.column = spec["column"]
+        self.frequency = spec["frequency"]
+        self.unit = spec.get("unit")
+        self.region = spec.get("region")
+        self.fred_id = spec.get("fred_id")
+        if self.format not in FORMATS:
+            raise ValueError(f"Dataset {dataset_id}: unknown format {self.format!r}")
+        if "max_staleness_days" in spec:
+            self.max_staleness = pd.Timedelta(days=spec["max_staleness_days"])
+        elif self.frequency in STALENESS:
+            self.max_staleness = STALENESS[self.frequency]
+        else:
+            raise ValueError(f"Dataset {dataset_id}: unknown frequency {self.frequency!r}")
+
+    @property
+    def date_col(self):
+        # Date column of the file as stored (the raw healthcare rows have none to parse)
+        return None if self.format == "healthcare" else "observation_date"
+
+
+class County:
+
+    def __init__(self, name, label, datasets):
+        self.name = name
+        self.label = label
+        self.datasets = datasets
+
+
+class Registry:
+
+    def __init__(self, manifest, root):
+        self.datasets = {dataset_id: Dataset(dataset_id, spec, root)
+                         for dataset_id, spec in manifest["datasets"].items()}
+        specs = manifest["counties"]
+        self.counties = {}
+        for name, spec in specs.items():
+            self.counties[name] = County(name, spec.get("label", name), self._county_datasets(name, specs))
+        salaries = manifest.get("salaries") or {}
+        self.salary_path = os.path.join(root, *salaries["path"].split("/")) if "path" in salaries else None
+        self.salary_region = salaries.get("default_region", "US")
+
+    def _county_datasets(self, name, specs, seen=()):
+        if name in seen:
+            raise ValueError(f"County fallback cycle: {' -> '.join(seen + (name,))}")
+        spec = specs[name]
+        datasets = {}
+        if spec.get("fallback"):
+            datasets.update(self._county_datasets(spec["fallback"], specs, seen + (name,)))
+        for kind, dataset_id in spec.get("series", {}).items():
+            if dataset_id not in self.datasets:
+                raise ValueError(f"County {name}: unknown dataset {dataset_id!r} for {kind}")
+            datasets[kind] = self.datasets[dataset_id]
+        return datasets
+
+    def county(self, name):
+        if name not in self.counties:
+            raise ValueError(f"Unknown county: {name}")
+        return self.counties[name]
+
+
+def load_registry(path=MANIFEST_PATH):
+    with open(path) as f:
+        manifest = json.load(f)
+    return Registry(manifest, os.path.dirname(path))
+
+
+registry = load_registry()
@@ -0,0 +1,51 @@
+import numpy as np
+
+# =============================================================================
+# Largest-Triangle-Three-Buckets Downsampling
+# =============================================================================
+# Keeps the visual shape of a long series in about as many points as the graph has pixels:
+# the first and last points are always kept, the rest is split into equal buckets and from each
+# bucket the point forming the largest triangle with the previously kept point and the average
+# of the next bucket is picked. Peaks and dips survive, unlike with plain striding.
+
+
+def lttb_indices(x, y, threshold):
+    # Indices of the points to keep (sorted), at most `threshold` of them
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)  # buckets between first and last point
+    picked = np.empty(threshold, dtype=int)
+    picked[0] = 0
+    picked[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_start = stop
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_stop].mean()
+        avg_y = y[next_start:next_stop].mean()
+        bx = x[start:stop]
+        by = y[start:stop]
+        area = np.abs((x[a] - avg_x) * (by - y[a]) - (x[a] - bx) * (avg_y - y[a]))
+        a = start + int(np.nanargmax(area)) if not np.isnan(area).all() else start
+        picked[i + 1] = a
+    return picked
+
+
+def downsample_indices(x, columns, threshold):
+    # Union of the LTTB picks of every column over a shared x, so the traces can keep sharing it.
+    # Each column gets an equal share of the budget, so the union never exceeds `threshold`.
+    columns = list(columns)
+    n = len(x)
+    if threshold >= n or not columns:
+        return np.arange(n)
+    per_column = max(threshold // len(columns), 3)
+    x = np.asarray(x, dtype="datetime64[ns]").astype(np.int64).astype(float)
+    keep = np.zeros(n, dtype=bool)
+    for values in columns:
+        keep[lttb_indices(x, values, per_column)] = True
+    return np.nonzero(keep)[0]
@@ -0,0 +1,170 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from cards import SALARY_MAX, SALARY_MIN, SALARY_STEP
+from county_data import county_cache, load_county_data, load_yearly_rollup
+from dashboard import build_bar_figure, build_line_figure, max_year, min_year
+from datasets import registry
+from figure_cache import FIGURE_SCHEMA
+from salary_store import salary_store
+
+# =============================================================================
+# Static Export
+# =============================================================================
+# Kiosk and CDN deployments serve the Play tab's graphs without a Python server. The input space
+# is finite: county x salary step (or career, which overrides the slider) x mode for the line
+# graph, and county x salary step (or career) x year for the bar graph. Multi-year comparisons
+# are left out because their combinations grow exponentially. Every combination is rendered on a
+# process pool. Each figure is written once as figures/<sha1 of its JSON>.json, so identical
+# figures share a file and a file's content never changes under its name. index.json maps
+#   counties[county]["line"][mode][choice] and counties[county]["bar"][year][choice]
+# to figure hashes, where a choice is a salary step ("35000") or a career name.
+#
+# A re-export reads the previous index and re-renders only the counties whose fingerprint
+# changed: source data (data token), career salaries, input space or FIGURE_SCHEMA. The new index
+# is written before files no index entry references are removed, so viewers never see a gap.
+
+EXPORT_WORKERS = int(os.environ.get("EXPORT_WORKERS", os.cpu_count() or 1))
+INDEX_FILE = "index.json"
+FIGURE_DIR = "figures"
+MODES = ["individual", "combined"]
+
+
+def input_space():
+    return {
+        "salaries": list(range(SALARY_MIN, SALARY_MAX + 1, SALARY_STEP)),
+        "careers": salary_store.occupations.tolist(),
+        "modes": MODES,
+        "years": list(range(min_year, max_year + 1))
+    }
+
+
+def county_fingerprint(county, space):
+    text = json.dumps([FIGURE_SCHEMA, county_cache.data_token(county), salary_store.token, space], sort_keys=True)
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def figure_path(out_dir, digest):
+    return os.path.join(out_dir, FIGURE_DIR, digest + ".json")
+
+
+def write_figure(out_dir, text):
+    # Content-addressed: an existing file already holds exactly this figure
+    digest = hashlib.sha1(text.encode()).hexdigest()
+    path = figure_path(out_dir, digest)
+    if not os.path.exists(path):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    return digest
+
+
+def render_group(out_dir, county, kind, group, choices):
+    # One county's line figures for a mode, or bar figures for a year; returns {choice: hash}
+    if kind == "line":
+        df = load_county_data(county)
+
+        def build(salary, career):
+            return build_line_figure(df, county, salary, career, group)
+    else:
+        rollup = load_yearly_rollup(county)
+
+        def build(salary, career):
+            return build_bar_figure(rollup, salary, career, [group])
+
+    hashes = {}
+    for choice in choices:
+        salary, career = (None, choice) if isinstance(choice, str) else (choice, None)
+        hashes[str(choice)] = write_figure(out_dir, build(salary, career).to_json())
+    return hashes
+
+
+def read_index(out_dir):
+    try:
+        with open(os.path.join(out_dir, INDEX_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_index(out_dir, index):
+    path = os.path.join(out_dir, INDEX_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(path + ".tmp", path)
+
+
+def referenced(entry):
+    return {digest for groups in (entry["line"], entry["bar"])
+            for hashes in groups.values() for digest in hashes.values()}
+
+
+def remove_unreferenced(out_dir, index):
+    keep = set()
+    for entry in index["counties"].values():
+        keep |= referenced(entry)
+    removed = 0
+    for name in os.listdir(os.path.join(out_dir, FIGURE_DIR)):
+        if name.endswith(".json") and name[:-len(".json")] not in keep:
+            os.remove(os.path.join(out_dir, FIGURE_DIR, name))
+            removed += 1
+    return removed
+
+
+def export(out_dir, workers=EXPORT_WORKERS, force=False):
+    started = time.perf_counter()
+    os.makedirs(os.path.join(out_dir, FIGURE_DIR), exist_ok=True)
+    previous = {} if force else read_index(out_dir).get("counties", {})
+    space = input_space()
+    choices = space["salaries"] + space["careers"]
+    index = dict(space, schema=FIGURE_SCHEMA, counties={})
+
+    tasks = []
+    for county in registry.counties:
+        fingerprint = county_fingerprint(county, space)
+        old = previous.get(county)
+        if (old is not None and old.get("fingerprint") == fingerprint
+                and all(os.path.exists(figure_path(out_dir, digest)) for digest in referenced(old))):
+            index["counties"][county] = old
+            continue
+        index["counties"][county] = {"fingerprint": fingerprint, "line": {}, "bar": {}}
+        tasks += [(county, "line", mode) for mode in MODES]
+        tasks += [(county, "bar", year) for year in space["years"]]
+
+    # County frames are loaded above (data_token), so forked workers start with them cached
+    if tasks:
+        with ProcessPoolExecutor(max_workers=max(min(workers, len(tasks)), 1)) as pool:
+            futures = [(task, pool.submit(render_group, out_dir, *task, choices)) for task in tasks]
+            for (county, kind, group), future in futures:
+                index["counties"][county][kind][str(group)] = future.result()
+
+    write_index(out_dir, index)
+    removed = remove_unreferenced(out_dir, index)
+    rendered = {county for county, _, _ in tasks}
+    combinations = len(tasks) * len(choices)
+    figures = set()
+    for entry in index["counties"].values():
+        figures |= referenced(entry)
+    return {
+        "rendered_counties": sorted(rendered),
+        "reused_counties": sorted(set(index["counties"]) - rendered),
+        "rendered_combinations": combinations,
+        "figures": len(figures),
+        "removed_figures": removed,
+        "seconds": round(time.perf_counter() - started, 2)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render every Play tab graph to static, content-addressed JSON")
+    parser.add_argument("out_dir", help="output directory (index.json and figures/)")
+    parser.add_argument("--workers", type=int, default=EXPORT_WORKERS, help="render processes")
+    parser.add_argument("--force", action="store_true", help="re-render every county, ignoring the previous index")
+    args = parser.parse_args()
+
+    print(json.dumps(export(args.out_dir, args.workers, args.force), indent=2))
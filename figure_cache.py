@@ -0,0 +1,223 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import phase
+
+# =============================================================================
+# Figure Memoization
+# =============================================================================
+# The graph callbacks have a small, finite input space (3 counties x 54 salary steps x 5 careers
+# x 2 modes x a handful of years), so rebuilt figures are memoized, keyed on the normalized
+# inputs plus a digest of the data behind them. The in-process layer is a bounded LRU with an
+# optional TTL that holds the figure as a read-only dict (FrozenDict, lists as tuples), so a hit
+# returns the cached object itself without parsing. Setting FIGURE_CACHE_DIR adds a second layer
+# of serialized JSON on local disk that all gunicorn workers on the box read and write, so a
+# figure built by one worker is a file read for the others. A failed disk write is logged and
+# the built figure is still returned.
+
+log = logging.getLogger(__name__)
+
+# Bump when the figure builders change shape so stale on-disk entries are never served
+FIGURE_SCHEMA = 4
+
+
+def figure_key(kind, county, data_token, salary=None, career=None, mode=None, year=None):
+    # A selected career overrides the slider, so the slider value is dropped from the key then.
+    if career is not None:
+        salary = None
+    elif salary is not None:
+        salary = int(salary)
+    if kind == "line":
+        mode = "combined" if mode == "combined" else "individual"
+        year = None
+    elif kind == "compare":
+        year = None  # mode carries the metric
+    else:
+        mode = None
+        if isinstance(year, (list, tuple)):
+            year = sorted(int(y) for y in year)
+        elif year is not None:
+            year = int(year)
+    return json.dumps([FIGURE_SCHEMA, kind, county, data_token, salary, career, mode, year])
+
+
+class FrozenDict(dict):
+    # Cached figures are shared by every request that hits them
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("cached figures are read-only")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = __ior__ = _readonly
+
+    def __reduce__(self):
+        # pickle and deepcopy would rebuild a dict subclass through __setitem__; build it from a
+        # plain dict instead (background callback results are pickled by the diskcache manager)
+        return FrozenDict, (dict(self),)
+
+
+def freeze(value):
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class FigureCache:
+
+    def __init__(self, maxsize=512, ttl=None, store_dir=None, max_store_files=20000):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.store_dir = store_dir
+        self.max_store_files = max_store_files
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if store_dir:
+            os.makedirs(store_dir, exist_ok=True)
+
+    def get_or_build(self, key, build):
+        # Returns the figure as a read-only dict, building (and storing) it on a miss
+        with phase("figure", "lookup"):
+            figure = self._lookup(key)
+        if figure is None:
+            with phase("figure", "build"):
+                fig = build()
+            with phase("figure", "serialize"):
+                text = fig.to_json()
+            with phase("figure", "deserialize"):
+                figure = freeze(json.loads(text))
+            self._remember(key, figure, len(text))
+            with phase("figure", "store"):
+                self._store(key, text)
+        return figure
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.store_hits + self.misses
+            return {
+                "hits": self.hits,
+                "store_hits": self.store_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": (self.hits + self.store_hits) / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": sum(size for _, size, _ in self._entries.values())
+            }
+
+    def _lookup(self, key):
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                figure, _, stored_at = cached
+                if self.ttl is None or now - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return figure
+                del self._entries[key]
+        text = self._load(key)
+        with self._lock:
+            if text is None:
+                self.misses += 1
+                return None
+            self.store_hits += 1
+        with phase("figure", "deserialize"):
+            figure = freeze(json.loads(text))
+        self._remember(key, figure, len(text))
+        return figure
+
+    def _remember(self, key, figure, size):
+        # size: length of the figure's JSON, for the cache's byte count
+        with self._lock:
+            self._entries[key] = (figure, size, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    # -------------------------------------------------------------------------
+    # Shared on-disk layer
+    # -------------------------------------------------------------------------
+
+    def _path(self, key):
+        return os.path.join(self.store_dir, hashlib.sha1(key.encode()).hexdigest() + ".json")
+
+    def _load(self, key):
+        if not self.store_dir:
+            return None
+        path = self._path(key)
+        try:
+            if self.ttl is not None and time.time() - os.stat(path).st_mtime >= self.ttl:
+                return None
+            with open(path, encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _store(self, key, text):
+        if not self.store_dir:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            log.warning("could not store figure in %s: %s", self.store_dir, e)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        self._writes += 1
+        if self._writes % 256 == 0:
+            self._prune_store()
+
+    def _prune_store(self):
+        # Keep the shared directory bounded by dropping the least recently written files
+        try:
+            names = [name for name in os.listdir(self.store_dir) if name.endswith(".json")]
+        except OSError:
+            return
+        if len(names) <= self.max_store_files:
+            return
+        aged = []
+        for name in names:
+            path = os.path.join(self.store_dir, name)
+            try:
+                aged.append((os.stat(path).st_mtime, path))
+            except OSError:
+                continue  # removed by another worker
+        aged.sort()
+        for _, path in aged[:len(aged) - self.max_store_files]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _env_float(name):
+    value = os.environ.get(name)
+    return float(value) if value else None
+
+
+figure_cache = FigureCache(
+    maxsize=int(os.environ.get("FIGURE_CACHE_SIZE", 512)),
+    ttl=_env_float("FIGURE_CACHE_TTL"),
+    store_dir=os.environ.get("FIGURE_CACHE_DIR") or None
+)
@@ -0,0 +1,67 @@
+import gc
+import os
+import subprocess
+import sys
+import time
+
+# =============================================================================
+# Preload-and-fork Serving
+# =============================================================================
+# `gunicorn dashboard:server` reads this file from the working directory. With preload_app the
+# master imports dashboard.py once and, before forking the workers, loads every dataset, county
+# frame, yearly rollup, raw table, the comparison frame, the affordability cube and the rendered
+# tabs (dashboard.preload_data). The frames' columns are read-only NumPy arrays
+# (county_data.freeze_frame), so every worker shares those pages copy-on-write instead of parsing
+# and holding its own copy. gc.freeze() moves the preloaded objects out of the collector's
+# reach, so collections in the workers do not write to (and so copy) their pages. Files that
+# change later are reloaded per worker, as before. PRELOAD_APP=0 gives each worker its own import.
+#
+# Background callback results must be visible to whichever worker the browser polls, so with
+# more than one worker they go through Dash's diskcache manager (BACKGROUND_CACHE_DIR, see jobs.py).
+# `python -m benchmarks.worker_memory` reports per-worker RSS/PSS/private memory for both modes.
+#
+# Exactly one process ingests the drop directory (INGEST_DROP_DIR): `python ingest.py --watch`,
+# started by the master. The variable is removed from the environment before the app is
+# imported, so no worker starts its own watcher. The workers pick the appended rows up through
+# their caches' freshness checks.
+
+bind = os.environ.get("BIND", "127.0.0.1:8050")
+workers = int(os.environ.get("WEB_WORKERS", 4))
+threads = int(os.environ.get("WEB_THREADS", 4))
+timeout = 120
+preload_app = os.environ.setdefault("PRELOAD_APP", "1") != "0"
+
+if workers > 1:
+    os.environ.setdefault("BACKGROUND_CACHE_DIR", os.path.join("cache", "background"))
+
+ingest_drop_dir = os.environ.pop("INGEST_DROP_DIR", None)
+ingest_interval = float(os.environ.get("INGEST_INTERVAL", 60))
+_ingest_process = None
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded import, before the first worker is forked
+    global _ingest_process
+    if ingest_drop_dir:
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ingest.py")
+        _ingest_process = subprocess.Popen([sys.executable, script, "--drop-dir", ingest_drop_dir,
+                                            "--watch", str(ingest_interval)])
+        server.log.info("Watching %s for new observations (pid %s)", ingest_drop_dir, _ingest_process.pid)
+    if not preload_app:
+        return
+    import dashboard
+    import metrics
+
+    start = time.perf_counter()
+    dashboard.preload_data()
+    gc.collect()
+    gc.freeze()
+    memory = metrics.process_memory()
+    server.log.info("Preloaded data in %.2fs, master RSS %.1f MiB", time.perf_counter() - start,
+                    memory.get("rss", 0) / 2 ** 20)
+
+
+def on_exit(server):
+    if _ingest_process is not None and _ingest_process.poll() is None:
+        _ingest_process.terminate()
+        _ingest_process.wait(5)
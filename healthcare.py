@@ -0,0 +1,105 @@
+import json
+import os
+
+import pandas as pd
+
+import snapshot
+
+# =============================================================================
+# Streaming Healthcare Aggregation
+# =============================================================================
+# The county pipeline only needs the mean billing amount per discharge date, so the healthcare
+# file is streamed in chunks reading just those two columns, with the date kept as a category
+# (a few thousand distinct strings instead of one object per row). Running sums and counts are
+# kept per date string and dates are parsed once per distinct value at the end, so memory is
+# bounded by the number of distinct dates rather than the file size. The result is persisted
+# under data/derived/ together with the source file's mtime/size and reused while it matches.
+
+DATE_COLUMN = "Discharge Date"
+AMOUNT_COLUMN = "Billing Amount"
+CHUNK_ROWS = 200_000
+
+DERIVED_DIR = os.path.join(snapshot.DATA_DIR, "derived")
+DERIVED_FILE = "healthcare_by_date.csv"
+
+
+def aggregate_healthcare(path, chunksize=CHUNK_ROWS):
+    sums = None
+    counts = None
+    chunks = pd.read_csv(
+        path,
+        usecols=[DATE_COLUMN, AMOUNT_COLUMN],
+        dtype={DATE_COLUMN: "category", AMOUNT_COLUMN: "float64"},
+        chunksize=chunksize
+    )
+    for chunk in chunks:
+        grouped = chunk.groupby(DATE_COLUMN, observed=True)[AMOUNT_COLUMN]
+        chunk_sums = grouped.sum()
+        chunk_counts = grouped.count()
+        chunk_sums.index = chunk_sums.index.astype(str)
+        chunk_counts.index = chunk_counts.index.astype(str)
+        if sums is None:
+            sums, counts = chunk_sums, chunk_counts
+        else:
+            sums = sums.add(chunk_sums, fill_value=0)
+            counts = counts.add(chunk_counts, fill_value=0)
+
+    if sums is None:
+        return pd.DataFrame({"observation_date": pd.to_datetime([]), "healthcare_cost": []})
+
+    # Different spellings of the same date collapse here, after parsing the distinct strings once
+    totals = pd.DataFrame({
+        "observation_date": pd.to_datetime(sums.index),
+        "total": sums.to_numpy(),
+        "count": counts.reindex(sums.index).to_numpy()
+    }).groupby("observation_date", as_index=False).sum()
+    totals = totals[totals["count"] > 0]
+    return pd.DataFrame({
+        "observation_date": totals["observation_date"].to_numpy(),
+        "healthcare_cost": (totals["total"] / totals["count"]).to_numpy()
+    })
+
+
+# =============================================================================
+# Persisted Result
+# =============================================================================
+
+def _derived_paths():
+    return os.path.join(DERIVED_DIR, DERIVED_FILE), os.path.join(DERIVED_DIR, DERIVED_FILE + ".json")
+
+
+def read_persisted(path):
+    data_path, meta_path = _derived_paths()
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta["source"] != path or meta["fingerprint"] != snapshot.source_fingerprint(path):
+            return None
+        return pd.read_csv(data_path, parse_dates=["observation_date"], float_precision="round_trip")
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def persist(path, df):
+    data_path, meta_path = _derived_paths()
+    os.makedirs(DERIVED_DIR, exist_ok=True)
+    df.to_csv(data_path + ".tmp", index=False, date_format="%Y-%m-%d")
+    os.replace(data_path + ".tmp", data_path)
+    with open(meta_path, "w") as f:
+        json.dump({"source": path, "fingerprint": snapshot.source_fingerprint(path)}, f)
+
+
+def load_healthcare_by_date(path):
+    # Snapshot first, then the persisted aggregate, then a fresh streaming pass
+    cached = snapshot.load_series("healthcare_by_date", path)
+    if cached is not None:
+        return cached
+    cached = read_persisted(path)
+    if cached is not None:
+        return cached
+    df = aggregate_healthcare(path)
+    try:
+        persist(path, df)
+    except OSError:
+        pass  # read-only deployments just recompute next time
+    return df
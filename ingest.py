@@ -0,0 +1,239 @@
+import argparse
+import csv
+import json
+import logging
+import os
+import shutil
+import threading
+
+import pandas as pd
+
+from county_data import refresh_county_data
+from datasets import registry
+from snapshot import DATA_DIR
+
+# =============================================================================
+# Incremental FRED Ingestion
+# =============================================================================
+# The FRED series only ever grow by one observation per month or year, so new observations
+# are appended to the stored CSVs instead of replacing them. Observations come from a drop
+# directory (one file per series, named after its FRED id) or from a client that speaks the
+# shape of the FRED observations API. Only observations newer than the last stored date are
+# appended; earlier dates (revisions, duplicates) are skipped. After appending, only the
+# county rows on or after the first new date are rebuilt and spliced into the cache.
+#
+# A drop file for an unknown series, or one that cannot be parsed, is moved to rejected/ with a
+# warning and the other files are still applied. Appends go to a copy of the CSV that replaces
+# the original in one os.replace, so readers never see a half-written file.
+
+log = logging.getLogger(__name__)
+
+INCOMING_DIR = os.path.join(DATA_DIR, "incoming")
+
+# FRED series id -> (stored CSV, value column), from the datasets that declare a fred_id
+FRED_SERIES = {
+    dataset.fred_id: (dataset.path, dataset.column)
+    for dataset in registry.datasets.values() if dataset.fred_id
+}
+
+# FRED reports a missing observation as "."
+FRED_MISSING = "."
+
+
+# =============================================================================
+# Observation Sources
+# =============================================================================
+
+def read_observations(path):
+    # Drop files are either a FRED API response (.json) or a two-column CSV of date,value (.csv).
+    # Returns [(date string, value string)] in file order.
+    if path.endswith(".json"):
+        with open(path) as f:
+            payload = json.load(f)
+        return [(obs["date"], obs["value"]) for obs in payload.get("observations", [])]
+    with open(path, newline="") as f:
+        rows = list(csv.reader(f))
+    if rows and rows[0] and not rows[0][0][:1].isdigit():
+        rows = rows[1:]  # header
+    return [(row[0], row[1]) for row in rows if len(row) >= 2]
+
+
+def check_observations(observations):
+    # Raises ValueError on a date or value that append_observations could not store
+    for date, value in observations:
+        pd.Timestamp(date)
+        if value not in (FRED_MISSING, ""):
+            float(value)
+    return observations
+
+
+class LocalFredClient:
+    # Stand-in for the FRED observations endpoint, serving <root>/<series id>.json files that
+    # use the same {"observations": [{"date": ..., "value": ...}]} shape as the real API.
+
+    def __init__(self, root):
+        self.root = root
+
+    def observations(self, series_id, observation_start=None):
+        path = os.path.join(self.root, f"{series_id}.json")
+        if not os.path.exists(path):
+            return []
+        observations = read_observations(path)
+        if observation_start is not None:
+            observations = [obs for obs in observations if obs[0] >= observation_start]
+        return observations
+
+
+# =============================================================================
+# Append
+# =============================================================================
+
+def last_observation_date(path):
+    # Reads just the tail of the file; the series are stored in date order
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - 4096))
+        lines = [line for line in f.read().decode().splitlines() if line.strip()]
+    if not lines or not lines[-1][:1].isdigit():
+        return None
+    return pd.Timestamp(lines[-1].split(",", 1)[0])
+
+
+def append_observations(path, observations):
+    # Appends observations newer than the stored series; returns the first appended date or None
+    last = last_observation_date(path)
+    new_rows = []
+    for date, value in sorted(observations, key=lambda obs: obs[0]):
+        if value in (FRED_MISSING, ""):
+            continue
+        stamp = pd.Timestamp(date)
+        if last is not None and stamp <= last:
+            continue
+        new_rows.append((stamp, value))
+        last = stamp
+    if not new_rows:
+        return None
+
+    needs_newline = False
+    with open(path, "rb") as f:
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        shutil.copyfile(path, tmp_path)
+        with open(tmp_path, "a", newline="") as f:
+            if needs_newline:
+                f.write("\n")
+            for stamp, value in new_rows:
+                f.write(f"{stamp.strftime('%Y-%m-%d')},{value}\n")
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return new_rows[0][0]
+
+
+def apply_updates(updates):
+    # updates: {series id: [(date, value)]}. Appends, then refreshes the affected county rows.
+    changed = {}
+    appended = {}
+    for series_id, observations in updates.items():
+        if series_id not in FRED_SERIES:
+            raise ValueError(f"Unknown FRED series: {series_id}")
+        path, _ = FRED_SERIES[series_id]
+        first_new = append_observations(path, observations)
+        if first_new is not None:
+            changed[path] = min(first_new, changed.get(path, first_new))
+            appended[series_id] = str(first_new.date())
+    refreshed = refresh_county_data(changed) if changed else {}
+    return {"appended": appended, "refreshed_counties": refreshed}
+
+
+def move_drop_files(drop_dir, names, subdir):
+    target = os.path.join(drop_dir, subdir)
+    os.makedirs(target, exist_ok=True)
+    for name in names:
+        shutil.move(os.path.join(drop_dir, name), os.path.join(target, name))
+
+
+def ingest_drop_dir(drop_dir=INCOMING_DIR):
+    # Processes every <series id>.csv/.json in drop_dir and moves it to drop_dir/processed, or to
+    # drop_dir/rejected when its series is unknown or it cannot be parsed
+    if not os.path.isdir(drop_dir):
+        return {"appended": {}, "refreshed_counties": {}, "rejected": []}
+    updates = {}
+    processed = []
+    rejected = []
+    for name in sorted(os.listdir(drop_dir)):
+        series_id, ext = os.path.splitext(name)
+        if ext not in (".csv", ".json"):
+            continue
+        try:
+            if series_id not in FRED_SERIES:
+                raise ValueError(f"Unknown FRED series: {series_id}")
+            observations = check_observations(read_observations(os.path.join(drop_dir, name)))
+        except (ValueError, KeyError, TypeError, IndexError, AttributeError) as e:
+            log.warning("rejecting %s: %s", name, e)
+            rejected.append(name)
+            continue
+        updates.setdefault(series_id, []).extend(observations)
+        processed.append(name)
+    move_drop_files(drop_dir, rejected, "rejected")
+    report = apply_updates(updates)
+    move_drop_files(drop_dir, processed, "processed")
+    return dict(report, rejected=rejected)
+
+
+def ingest_from_client(client):
+    # Asks the client only for observations after each stored series' last date
+    updates = {}
+    for series_id, (path, _) in FRED_SERIES.items():
+        last = last_observation_date(path)
+        start = None if last is None else (last + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+        observations = client.observations(series_id, observation_start=start)
+        if observations:
+            updates[series_id] = observations
+    return apply_updates(updates)
+
+
+class DropDirWatcher(threading.Thread):
+    # Polls the drop directory from inside the server process, so appended rows are spliced into
+    # that process's county cache rather than triggering a full reload.
+
+    def __init__(self, drop_dir=INCOMING_DIR, interval=60.0):
+        super().__init__(name="ingest-watcher", daemon=True)
+        self.drop_dir = drop_dir
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                ingest_drop_dir(self.drop_dir)
+            except Exception:
+                log.exception("ingesting %s failed", self.drop_dir)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Append new FRED observations to the stored series")
+    parser.add_argument("--drop-dir", default=INCOMING_DIR, help="directory of <series id>.csv/.json files")
+    parser.add_argument("--fred-dir", help="read from a local FRED stand-in directory instead")
+    parser.add_argument("--watch", type=float, metavar="SECONDS",
+                        help="keep polling the drop directory at this interval instead of one pass")
+    args = parser.parse_args()
+
+    if args.watch:
+        # Runs until terminated; gunicorn.conf.py starts this as the single watcher for all workers
+        logging.basicConfig(level=logging.INFO)
+        DropDirWatcher(args.drop_dir, args.watch).run()
+    else:
+        if args.fred_dir:
+            result = ingest_from_client(LocalFredClient(args.fred_dir))
+        else:
+            result = ingest_drop_dir(args.drop_dir)
+        print(json.dumps(result, indent=2))
@@ -0,0 +1,268 @@
+import itertools
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from dash import DiskcacheManager
+from dash.background_callback.managers import BaseBackgroundCallbackManager
+from dash.exceptions import PreventUpdate
+
+import metrics
+
+# =============================================================================
+# Background Callback Jobs
+# =============================================================================
+# Heavy callbacks run as Dash background callbacks: the request that triggers one only submits
+# a job and returns, and the browser polls for progress and the result, so web worker threads
+# stay free for cheap requests. By default jobs run on a pool of JOB_WORKERS threads inside the
+# server process (the simulator's large runs still fan out to its own process pool). Identical
+# in-flight jobs (same callback and inputs) are deduplicated: every request gets its own ticket,
+# the tickets share one job, and the job is only cancelled once its last ticket is. Dash cancels
+# a browser's ticket when the callback's inputs change again; the job notices at its next
+# progress update.
+#
+# Results live in the process that ran the job, so deployments with several worker processes
+# set BACKGROUND_CACHE_DIR to use Dash's DiskcacheManager instead. That needs the diskcache,
+# multiprocess and psutil packages (`pip install "dash[diskcache]"`), which plain dash lacks.
+#
+# Jobs are wrapped by _job_fn here rather than by Dash's private diskcache helper, which may
+# change between Dash releases. The wrapper passes set_progress and stores the result, a
+# PreventUpdate or the error in the shapes Dash's polling reads. It does not set up
+# dash.callback_context or set_props inside the job; the background callbacks use neither.
+#
+# Under DiskcacheManager a job runs in its own process, so what metrics.instrument() records
+# there is never scraped. Both managers therefore time each job in the web process, from
+# submission until a poll collects the result (dash_background_job_seconds{callback}). That
+# includes queueing and polling delay. With diskcache the submission time is kept in the shared
+# cache, since the collecting poll may reach another worker.
+
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 4))
+# Finished results nobody collected (closed tabs) are dropped after this many seconds
+RESULT_TTL = 300
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def _job_fn(fn, store, progress):
+    def job_fn(result_key, progress_key, args, context):
+        def set_progress(value):
+            store.set(progress_key, list(value) if isinstance(value, (list, tuple)) else [value])
+
+        maybe_progress = [set_progress] if progress else []
+        try:
+            if isinstance(args, dict):
+                output = fn(*maybe_progress, **args)
+            elif isinstance(args, (list, tuple)):
+                output = fn(*maybe_progress, *args)
+            else:
+                output = fn(*maybe_progress, args)
+        except PreventUpdate:
+            output = {"_dash_no_update": "_dash_no_update"}
+        except JobCancelled:
+            raise
+        except Exception as e:
+            output = {"background_callback_error": {"msg": str(e), "tb": traceback.format_exc()}}
+        store.set(result_key, output)
+
+    return job_fn
+
+
+def _record_job(name, seconds, result):
+    labels = {"callback": name}
+    metrics.registry.observe("dash_background_job_seconds", seconds, labels)
+    if isinstance(result, dict) and "background_callback_error" in result:
+        metrics.registry.inc("dash_background_job_errors_total", labels)
+
+
+class _Job:
+    # One running callback and the store its job function writes to (result, progress, set_props)
+
+    def __init__(self, key, name):
+        self.key = key
+        self.name = name
+        self.submitted = time.monotonic()
+        self.timed = False
+        self.values = {}
+        self.tickets = set()
+        self.cancelled = False
+        self.finished = None
+        self.future = None
+
+    def set(self, name, value):
+        if self.cancelled:
+            raise JobCancelled(self.key)
+        self.values[name] = value
+
+    def get(self, name, default=None):
+        return self.values.get(name, default)
+
+
+class LocalJobManager(BaseBackgroundCallbackManager):
+
+    def __init__(self, workers=JOB_WORKERS, cache_by=None):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dash-job")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._tickets = {}
+        self._ticket_ids = itertools.count(1)
+        self._job_names = {}
+        self._secret = None
+        self.submitted = 0
+        self.deduplicated = 0
+        self.cancelled = 0
+        super().__init__(cache_by)
+
+    def make_job_fn(self, fn, progress, key=None):
+        # Bound to a job's own store when the job is submitted
+        def job_fn(store):
+            return _job_fn(fn, store, progress)
+
+        self._job_names[job_fn] = fn.__name__
+        return job_fn
+
+    def _ticket(self, job):
+        try:
+            return int(job)
+        except (TypeError, ValueError):
+            return None
+
+    def _finish(self, job):
+        job.finished = time.monotonic()
+
+    def _expire(self):
+        now = time.monotonic()
+        for ticket, job in list(self._tickets.items()):
+            if job.finished is not None and now - job.finished > RESULT_TTL:
+                self._detach(ticket)
+
+    def _detach(self, ticket):
+        # Drops a ticket; returns its job if that was the job's last ticket
+        job = self._tickets.pop(ticket, None)
+        if job is None:
+            return None
+        job.tickets.discard(ticket)
+        if job.tickets:
+            return None
+        if self._jobs.get(job.key) is job and (job.finished is None or self.cache_by is None):
+            del self._jobs[job.key]
+        return job
+
+    def call_job_fn(self, key, job_fn, args, context):
+        with self._lock:
+            self._expire()
+            job = self._jobs.get(key)
+            if job is None or job.finished is not None:
+                job = self._jobs[key] = _Job(key, self._job_names.get(job_fn, "callback"))
+                job.future = self._executor.submit(job_fn(job), key, self._make_progress_key(key), args, context)
+                job.future.add_done_callback(lambda _: self._finish(job))
+                self.submitted += 1
+            else:
+                self.deduplicated += 1
+            ticket = next(self._ticket_ids)
+            job.tickets.add(ticket)
+            self._tickets[ticket] = job
+        return ticket
+
+    def terminate_job(self, job):
+        with self._lock:
+            last = self._detach(self._ticket(job))
+            if last is not None and last.finished is None:
+                last.cancelled = True
+                last.future.cancel()
+                self.cancelled += 1
+
+    def terminate_unhealthy_job(self, job):
+        return False
+
+    def job_running(self, job):
+        with self._lock:
+            found = self._tickets.get(self._ticket(job))
+        return found is not None and found.finished is None
+
+    def get_progress(self, key):
+        with self._lock:
+            job = self._jobs.get(key)
+        return job.get(self._make_progress_key(key)) if job is not None else None
+
+    def result_ready(self, key):
+        with self._lock:
+            job = self._jobs.get(key)
+        return job is not None and key in job.values
+
+    def get_result(self, key, job):
+        with self._lock:
+            ticket = self._ticket(job)
+            found = self._tickets.get(ticket) or self._jobs.get(key)
+            if found is None or key not in found.values:
+                return self.UNDEFINED
+            self._detach(ticket)
+            if not found.timed:
+                found.timed = True
+                _record_job(found.name, time.monotonic() - found.submitted, found.values[key])
+            return found.values[key]
+
+    def get_updated_props(self, key):
+        with self._lock:
+            job = self._jobs.get(key)
+            return job.values.pop(self._make_set_props_key(key), {}) if job is not None else {}
+
+    def clear_cache_entry(self, key):
+        with self._lock:
+            self._jobs.pop(key, None)
+
+    def get_or_create_signing_secret(self, generate):
+        with self._lock:
+            if self._secret is None:
+                self._secret = generate()
+            return self._secret
+
+    def stats(self):
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job.finished is None)
+        return {
+            "running": running,
+            "submitted": self.submitted,
+            "deduplicated": self.deduplicated,
+            "cancelled": self.cancelled
+        }
+
+
+class TimedDiskcacheManager(DiskcacheManager):
+
+    def __init__(self, *args, **kwargs):
+        self._job_names = {}
+        super().__init__(*args, **kwargs)
+
+    def make_job_fn(self, fn, progress, key=None):
+        job_fn = super().make_job_fn(fn, progress, key)
+        self._job_names[job_fn] = fn.__name__
+        return job_fn
+
+    def call_job_fn(self, key, job_fn, args, context):
+        self.handle.set(f"{key}-submitted", (self._job_names.get(job_fn, "callback"), time.time()),
+                        expire=RESULT_TTL)
+        return super().call_job_fn(key, job_fn, args, context)
+
+    def get_result(self, key, job):
+        result = super().get_result(key, job)
+        if result is not self.UNDEFINED:
+            submitted = self.handle.pop(f"{key}-submitted", None)
+            if submitted is not None:
+                _record_job(submitted[0], time.time() - submitted[1], result)
+        return result
+
+
+def background_manager():
+    # Dash's diskcache manager when BACKGROUND_CACHE_DIR is set, the in-process job pool otherwise
+    cache_dir = os.environ.get("BACKGROUND_CACHE_DIR")
+    if cache_dir:
+        try:
+            import diskcache
+        except ImportError as e:
+            raise ImportError('BACKGROUND_CACHE_DIR needs diskcache: pip install "dash[diskcache]"') from e
+        return TimedDiskcacheManager(diskcache.Cache(cache_dir), expire=RESULT_TTL)
+    return LocalJobManager()
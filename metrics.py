@@ -0,0 +1,263 @@
+import cProfile
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# =============================================================================
+# Hot-path Instrumentation
+# =============================================================================
+# In-process counters, gauges and fixed-bucket histograms, rendered in the Prometheus text
+# format on /metrics. Callbacks are wrapped with instrument(), the phases inside them (cache
+# checks, CSV reads, alignment, figure build/serialize) with phase(), and the Flask hooks record the
+# size and wall time of every Dash update response. Cache hit rates are pulled from the caches'
+# own stats() when /metrics is scraped. Each worker process reports its own numbers. Background
+# callbacks that run in a separate job process (Dash's diskcache manager) record nothing through
+# instrument(); jobs.py times them from the web process instead.
+#
+# Setting PROFILE_SLOW_MS profiles each callback with cProfile and keeps the .prof dump (under
+# PROFILE_DIR) of calls slower than the threshold.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+PROFILE_SLOW_MS = float(os.environ["PROFILE_SLOW_MS"]) if os.environ.get("PROFILE_SLOW_MS") else None
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+def _labels_text(labels, extra=None):
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = [
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in pairs
+    ]
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta = {}
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = []
+
+    def describe(self, name, kind, help_text):
+        self._meta[name] = (kind, help_text)
+
+    def inc(self, name, labels=None, value=1):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, labels=None, buckets=LATENCY_BUCKETS):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def register_collector(self, collect):
+        # collect() -> [(name, labels dict, value)], read as gauges at scrape time
+        self._collectors.append(collect)
+
+    def render(self):
+        samples = {}
+        with self._lock:
+            for (name, labels), value in self._counters.items():
+                samples.setdefault(name, []).append(f"{name}{_labels_text(labels)} {_number(value)}")
+            for (name, labels), histogram in self._histograms.items():
+                lines = samples.setdefault(name, [])
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels_text(labels, ('le', _number(bound)))} {cumulative}")
+                lines.append(f"{name}_bucket{_labels_text(labels, ('le', '+Inf'))} {histogram.count}")
+                lines.append(f"{name}_sum{_labels_text(labels)} {_number(histogram.sum)}")
+                lines.append(f"{name}_count{_labels_text(labels)} {histogram.count}")
+        for collect in self._collectors:
+            for name, labels, value in collect():
+                samples.setdefault(name, []).append(
+                    f"{name}{_labels_text(sorted(labels.items()))} {_number(value)}"
+                )
+
+        out = []
+        for name in sorted(samples):
+            kind, help_text = self._meta.get(name, ("gauge", name))
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(samples[name])
+        return "\n".join(out) + "\n"
+
+
+registry = Registry()
+registry.describe("dash_callback_seconds", "histogram", "Server callback wall time")
+registry.describe("dash_callback_calls_total", "counter", "Server callback invocations")
+registry.describe("dash_callback_errors_total", "counter", "Server callbacks that raised")
+registry.describe("dash_phase_seconds", "histogram", "Time spent in a phase inside a callback")
+registry.describe("dash_response_bytes", "histogram", "Size of Dash update responses")
+registry.describe("dash_request_seconds", "histogram", "Dash update request wall time, including JSON serialization")
+registry.describe("dash_slow_profiles_total", "counter", "cProfile dumps written for slow callbacks")
+registry.describe("dash_background_job_seconds", "histogram",
+                  "Background callback time from submission until its result is collected")
+registry.describe("dash_background_job_errors_total", "counter", "Background callbacks that raised")
+registry.describe("process_memory_bytes", "gauge", "Memory of this worker process by kind (rss, pss, shared, private)")
+
+
+# =============================================================================
+# Timers
+# =============================================================================
+
+@contextmanager
+def phase(scope, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe("dash_phase_seconds", time.perf_counter() - start, {"scope": scope, "phase": name})
+
+
+# Only one cProfile profiler can be active per process, so concurrent calls run unprofiled
+_profile_lock = threading.Lock()
+
+
+def _dump_profile(profiler, name, elapsed):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S") + f".{time.time_ns() % 1_000_000_000:09d}"
+    path = os.path.join(PROFILE_DIR, f"{name}-{stamp}-{int(elapsed * 1000)}ms-{os.getpid()}.prof")
+    profiler.dump_stats(path)
+    registry.inc("dash_slow_profiles_total", {"callback": name})
+
+
+def instrument(name):
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            labels = {"callback": name}
+            registry.inc("dash_callback_calls_total", labels)
+            profiler = None
+            if PROFILE_SLOW_MS is not None and _profile_lock.acquire(blocking=False):
+                profiler = cProfile.Profile()
+            start = time.perf_counter()
+            try:
+                if profiler is not None:
+                    profiler.enable()
+                return func(*args, **kwargs)
+            except Exception:
+                registry.inc("dash_callback_errors_total", labels)
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                registry.observe("dash_callback_seconds", elapsed, labels)
+                if profiler is not None:
+                    profiler.disable()
+                    _profile_lock.release()
+                    if elapsed * 1000 >= PROFILE_SLOW_MS:
+                        _dump_profile(profiler, name, elapsed)
+        return wrapper
+    return decorate
+
+
+# =============================================================================
+# Cache Gauges
+# =============================================================================
+
+def cache_collector(cache_name, stats):
+    # Exposes every numeric field of a cache's stats() as cache_<field>{cache="<name>"}
+    def collect():
+        return [
+            (f"cache_{field}", {"cache": cache_name}, value)
+            for field, value in stats().items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+        ]
+    return collect
+
+
+# =============================================================================
+# Process Memory
+# =============================================================================
+# Pages a preloading master shares with its forked workers count fully in each worker's RSS, so
+# the totals that matter are PSS (shared pages split between the processes mapping them) and
+# private memory (what the worker alone holds). Read from /proc, so only reported on Linux.
+
+SMAPS_FIELDS = {
+    "Rss": "rss",
+    "Pss": "pss",
+    "Shared_Clean": "shared",
+    "Shared_Dirty": "shared",
+    "Private_Clean": "private",
+    "Private_Dirty": "private"
+}
+
+
+def process_memory(pid="self"):
+    # {"rss", "pss", "shared", "private"} in bytes, {} where /proc/<pid>/smaps_rollup is missing
+    usage = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                if name in SMAPS_FIELDS:
+                    kind = SMAPS_FIELDS[name]
+                    usage[kind] = usage.get(kind, 0) + int(rest.split()[0]) * 1024
+    except (OSError, ValueError):
+        return {}
+    return usage
+
+
+def memory_collector():
+    return [("process_memory_bytes", {"kind": kind}, value) for kind, value in process_memory().items()]
+
+
+# =============================================================================
+# Flask Integration
+# =============================================================================
+
+def install(server, path="/metrics"):
+    from flask import Response, g, request
+
+    @server.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @server.after_request
+    def _record_response(response):
+        if request.path.endswith("/_dash-update-component"):
+            body = request.get_json(silent=True) or {}
+            labels = {"output": body.get("output", "")}
+            registry.observe("dash_response_bytes", response.calculate_content_length() or 0, labels,
+                             buckets=SIZE_BUCKETS)
+            start = getattr(g, "metrics_start", None)
+            if start is not None:
+                registry.observe("dash_request_seconds", time.perf_counter() - start, labels)
+        return response
+
+    @server.route(path)
+    def _metrics():
+        return Response(registry.render(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,167 @@
+import math
+
+import pandas as pd
+
+from county_data import FrameCache, load_dataset
+from datasets import registry
+from variables_and_helper_methods import load_csv
+
+# =============================================================================
+# Raw Data Tables
+# =============================================================================
+# The Raw Data tab never ships a whole dataset to the browser. Each DataTable runs with
+# page/sort/filter actions set to "custom" and asks the server for one page at a time; the
+# frames behind it are loaded once and shared through a FrameCache. One table per dataset of
+# the manifest; the FRED series reuse the frame the county pipeline parsed.
+
+RAW_TABLES = [
+    {"id": dataset.id, "title": dataset.title, "path": dataset.path, "date_col": dataset.date_col}
+    for dataset in registry.datasets.values()
+]
+RAW_TABLES_BY_ID = {table["id"]: table for table in RAW_TABLES}
+
+
+def _load_raw_table(table_id):
+    dataset = registry.datasets[table_id]
+    if dataset.format == "fred":
+        return load_dataset(table_id)
+    return load_csv(dataset.path, date_col=dataset.date_col)
+
+
+def _raw_table_sources(table_id):
+    if table_id not in RAW_TABLES_BY_ID:
+        raise ValueError(f"Unknown raw table: {table_id}")
+    return {"csv": RAW_TABLES_BY_ID[table_id]["path"]}
+
+
+raw_table_cache = FrameCache(_load_raw_table, _raw_table_sources, name="raw_table")
+
+
+def load_raw_table(table_id):
+    return raw_table_cache.get(table_id)
+
+
+def table_columns(df):
+    columns = []
+    for col in df.columns:
+        kind = df[col].dtype.kind
+        if kind == "M":
+            col_type = "datetime"
+        elif kind in "iuf":
+            col_type = "numeric"
+        else:
+            col_type = "text"
+        columns.append({"name": col, "id": col, "type": col_type})
+    return columns
+
+
+# =============================================================================
+# Server-side Filter / Sort / Page
+# =============================================================================
+
+FILTER_OPERATORS = [["ge ", ">="], ["le ", "<="], ["lt ", "<"], ["gt ", ">"], ["ne ", "!="], ["eq ", "="],
+                    ["contains "], ["datestartswith "]]
+
+# DataTable prefixes every operator but datestartswith with the column's filter case:
+# "{x} s> 5", "{title} scontains Foo", "{title} icontains foo" (filter_options, default "s")
+CASE_PREFIXES = ("s", "i")
+
+
+def split_filter_part(filter_part):
+    # Parses one "{column} op value" clause of a DataTable filter_query into
+    # (column, operator, value, case_insensitive). The operator is only looked for right after
+    # the column's closing brace, so operator text inside the column name or the value
+    # ("{a=b} contains x<y") is left alone.
+    start = filter_part.find("{")
+    end = filter_part.find("}", start + 1)
+    if start < 0 or end < 0:
+        return None, None, None, False
+    name = filter_part[start + 1:end]
+    rest = filter_part[end + 1:].lstrip()
+    case_insensitive = False
+    if rest[:1].lower() in CASE_PREFIXES and not rest.lower().startswith("datestartswith"):
+        case_insensitive = rest[0].lower() == "i"
+        rest = rest[1:]
+    for operator_type in FILTER_OPERATORS:
+        for operator in operator_type:
+            if rest.lower().startswith(operator):
+                value_part = rest[len(operator):].strip()
+                v0 = value_part[:1]
+                operator_name = operator_type[0].strip()
+                if v0 and v0 == value_part[-1] and v0 in ("'", '"', "`") and len(value_part) > 1:
+                    value = value_part[1:-1].replace("\\" + v0, v0)
+                elif operator_name in ("contains", "datestartswith"):
+                    value = value_part
+                else:
+                    try:
+                        value = float(value_part)
+                    except ValueError:
+                        value = value_part
+                return name, operator_name, value, case_insensitive
+    return None, None, None, False
+
+
+def _filter_mask(column, operator, value, case_insensitive=False):
+    if operator in ("eq", "ne", "lt", "le", "gt", "ge"):
+        if column.dtype.kind == "M":
+            value = pd.Timestamp(str(value))
+        elif column.dtype.kind not in "iuf":
+            value = str(value)
+            if case_insensitive:
+                column = column.astype(str).str.lower()
+                value = value.lower()
+        return getattr(column, operator)(value)
+    if column.dtype.kind == "M":
+        text = column.dt.strftime("%Y-%m-%d")
+    else:
+        text = column.astype(str)
+    if operator == "contains":
+        if case_insensitive:
+            return text.str.lower().str.contains(str(value).lower(), regex=False)
+        return text.str.contains(str(value), regex=False)
+    return text.str.startswith(str(value))
+
+
+def apply_filter(df, filter_query):
+    if not filter_query:
+        return df
+    mask = None
+    for filter_part in filter_query.split(" && "):
+        col_name, operator, value, case_insensitive = split_filter_part(filter_part)
+        if col_name not in df.columns:
+            continue
+        try:
+            part = _filter_mask(df[col_name], operator, value, case_insensitive)
+        except (TypeError, ValueError):
+            continue
+        mask = part if mask is None else mask & part
+    return df if mask is None else df[mask.fillna(False).to_numpy(dtype=bool)]
+
+
+def apply_sort(df, sort_by):
+    sort_by = [s for s in (sort_by or []) if s["column_id"] in df.columns]
+    if not sort_by:
+        return df
+    return df.sort_values(
+        [s["column_id"] for s in sort_by],
+        ascending=[s["direction"] == "asc" for s in sort_by],
+        kind="stable"
+    )
+
+
+def page_records(df):
+    page = df.copy()
+    for col in page.columns:
+        if page[col].dtype.kind == "M":
+            page[col] = page[col].dt.strftime("%Y-%m-%d")
+    return page.to_dict("records")
+
+
+def query_table(df, page_current, page_size, sort_by=None, filter_query=""):
+    # Returns (records for the visible page, total page count)
+    page_current = page_current or 0
+    page_size = page_size or 5
+    df = apply_sort(apply_filter(df, filter_query), sort_by)
+    page_count = max(1, math.ceil(len(df) / page_size))
+    start = page_current * page_size
+    return page_records(df.iloc[start:start + page_size]), page_count
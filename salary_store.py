@@ -0,0 +1,147 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from datasets import registry
+
+# =============================================================================
+# Occupation Salary Store
+# =============================================================================
+# Career salaries come from a BLS-style wage table (occupation,region,year,annual_wage). The
+# manifest's "salaries" entry names the file and the default region. The table is held as one
+# dense float array (region x occupation x year) over every year from the first to the last in
+# the file, with occupations sorted by name:
+# - gaps between observed years are linearly interpolated once at load;
+# - an occupation's years before its first or after its last observation take the nearest
+#   observed wage;
+# - occupations a region lacks take the default region's wages.
+# A lookup is then an index computation, vectorized over any number of years. Years outside the
+# table (before its first or after its last year) take the last year's wage, as the hard-coded
+# career salaries did with their 2023 fallback.
+#
+# The career dropdown searches the store on the server. Each occupation is indexed under the
+# lower-cased suffix starting at each of its words, and those keys are sorted, so a prefix
+# ("ana") matching any word ("Data Analyst") is two binary searches. Only the matches are sent to
+# the browser.
+
+# Occupations sent to the career dropdown per search (and in the initial layout)
+SEARCH_LIMIT = 20
+
+
+class SalaryStore:
+
+    def __init__(self, frame, default_region):
+        frame = frame.groupby(["region", "occupation", "year"], as_index=False)["annual_wage"].mean()
+        self.occupations = np.array(sorted(frame["occupation"].unique()), dtype=str)
+        self.regions = sorted(frame["region"].unique())
+        if len(frame) and default_region not in self.regions:
+            raise ValueError(f"Salary table has no rows for the default region {default_region!r}")
+        self.default_region = default_region
+        self.first_year = int(frame["year"].min()) if len(frame) else 0
+        self.years = np.arange(self.first_year, int(frame["year"].max()) + 1 if len(frame) else 0)
+        self._region_rows = {region: row for row, region in enumerate(self.regions)}
+
+        values = np.full((len(self.regions), len(self.occupations), len(self.years)), np.nan)
+        values[
+            frame["region"].map(self._region_rows).to_numpy(),
+            np.searchsorted(self.occupations, frame["occupation"].to_numpy(dtype=str)),
+            frame["year"].to_numpy(dtype=int) - self.first_year
+        ] = frame["annual_wage"].to_numpy(dtype=float)
+        values = _interpolate_years(values)
+        if len(frame):
+            default = values[self._region_rows[default_region]]
+            values = np.where(np.isnan(values), default[np.newaxis], values)
+        values.flags.writeable = False
+        self.values = values
+        self._build_search_index()
+        self.token = hashlib.sha1(values.tobytes() + "\0".join(self.occupations).encode()).hexdigest()
+
+    def __contains__(self, occupation):
+        pos = np.searchsorted(self.occupations, occupation)
+        return bool(pos < len(self.occupations) and self.occupations[pos] == occupation)
+
+    def __len__(self):
+        return len(self.occupations)
+
+    def row(self, occupation, region=None):
+        # Wages for every year of self.years
+        if occupation not in self:
+            raise KeyError(occupation)
+        region_row = self._region_rows.get(region or self.default_region, self._region_rows[self.default_region])
+        return self.values[region_row, np.searchsorted(self.occupations, occupation)]
+
+    def series(self, occupation, years, region=None):
+        pos = np.asarray(years, dtype=int) - self.first_year
+        pos = np.where((pos < 0) | (pos >= len(self.years)), len(self.years) - 1, pos)
+        return self.row(occupation, region)[pos]
+
+    def salary(self, occupation, year, region=None):
+        return float(self.series(occupation, [year], region)[0])
+
+    # -------------------------------------------------------------------------
+    # Search
+    # -------------------------------------------------------------------------
+
+    def _build_search_index(self):
+        keys = []
+        ids = []
+        for i, name in enumerate(self.occupations):
+            lowered = name.lower()
+            for start in [0] + [pos + 1 for pos, char in enumerate(lowered) if char == " "]:
+                keys.append(lowered[start:])
+                ids.append(i)
+        order = np.argsort(np.array(keys, dtype=str), kind="stable")
+        self._keys = np.array(keys, dtype=str)[order]
+        self._key_ids = np.array(ids, dtype=int)[order]
+
+    def search(self, text, limit=SEARCH_LIMIT):
+        # Occupations with a word starting with `text`: those whose name starts with it first,
+        # each group alphabetical. An empty text returns the first occupations.
+        prefix = (text or "").strip().lower()
+        if not prefix:
+            return self.occupations[:limit].tolist()
+        lo = np.searchsorted(self._keys, prefix, side="left")
+        hi = np.searchsorted(self._keys, prefix + "\U0010ffff", side="left")
+        ids = np.unique(self._key_ids[lo:hi])
+        names = self.occupations[ids]
+        leading = np.char.startswith(np.char.lower(names), prefix)
+        return np.concatenate([names[leading], names[~leading]])[:limit].tolist()
+
+
+def _interpolate_years(values):
+    # Linear interpolation along the last axis between observed values, nearest value outside
+    observed = ~np.isnan(values)
+    steps = np.arange(values.shape[-1])
+    before = np.maximum.accumulate(np.where(observed, steps, -1), axis=-1)
+    after = np.minimum.accumulate(np.where(observed, steps, values.shape[-1])[..., ::-1], axis=-1)[..., ::-1]
+    before_known = before >= 0
+    after_known = after < values.shape[-1]
+    lo = np.where(before_known, before, after)
+    hi = np.where(after_known, after, before)
+    lo_values = np.take_along_axis(values, np.clip(lo, 0, values.shape[-1] - 1), axis=-1)
+    hi_values = np.take_along_axis(values, np.clip(hi, 0, values.shape[-1] - 1), axis=-1)
+    span = np.where(hi > lo, hi - lo, 1)
+    weight = np.where(hi > lo, (steps - lo) / span, 0.0)
+    filled = lo_values + (hi_values - lo_values) * weight
+    return np.where(before_known | after_known, filled, np.nan)
+
+
+def load_salary_store(path=None, default_region=None):
+    path = path or registry.salary_path
+    default_region = default_region or registry.salary_region
+    if path is None:
+        frame = pd.DataFrame({"region": [], "occupation": [], "year": [], "annual_wage": []})
+    else:
+        frame = pd.read_csv(path, dtype={"occupation": str, "region": str})
+        missing = {"occupation", "region", "year", "annual_wage"} - set(frame.columns)
+        if missing:
+            raise ValueError(f"Salary table {path} lacks columns: {', '.join(sorted(missing))}")
+    return SalaryStore(frame, default_region)
+
+
+def career_options(careers):
+    return [{"label": career, "value": career} for career in careers]
+
+
+salary_store = load_salary_store()
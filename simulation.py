@@ -0,0 +1,164 @@
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+# =============================================================================
+# Monte Carlo Savings Simulator
+# =============================================================================
+# Projects a yearly savings contribution (salary minus combined expenses) forward by
+# bootstrapping whole historical years from assets/historic.csv, so the asset returns and the
+# inflation of a sampled year stay together. Every path is simulated at once as a
+# (paths x years) array: with growth G_t = prod(1 + r_1..r_t) and a contribution c at the start
+# of each year, the balance is B_t = c * G_t * sum_{k<=t} 1 / G_{k-1}, which is two cumulative
+# operations along the years axis instead of a Python loop. Large path counts are split into
+# chunks with independent random streams and run on a process pool; the workers write their
+# paths straight into one shared-memory array and then compute the percentiles for a block of
+# years each, so only the bands are ever pickled back.
+
+HISTORIC_PATH = os.path.join("assets", "historic.csv")
+
+# Column in historic.csv -> label shown in the dashboard
+ASSET_COLUMNS = {
+    "S&P 500": "Stocks (S&P 500)",
+    "10yr T.Bond": "Treasury Bonds (10yr)",
+    "Baa Corp Bond": "Corporate Bonds (Baa)",
+    "3-mon T.Bill": "Treasury Bills (3-month)"
+}
+INFLATION_COLUMN = "Inflation"
+
+PERCENTILES = [5, 25, 50, 75, 95]
+
+# Paths per pool task; below this everything runs in the calling process
+CHUNK_PATHS = 25_000
+SIMULATION_WORKERS = int(os.environ.get("SIMULATION_WORKERS", os.cpu_count() or 1))
+
+
+@functools.lru_cache(maxsize=4)
+def load_historic(path=HISTORIC_PATH):
+    # Returns (years, returns[n_years x n_assets] in ASSET_COLUMNS order, inflation[n_years])
+    df = pd.read_csv(path)
+    df.columns = df.columns.str.strip()
+    for col in list(ASSET_COLUMNS) + [INFLATION_COLUMN]:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    df = df.dropna(subset=list(ASSET_COLUMNS) + [INFLATION_COLUMN])
+    returns = df[list(ASSET_COLUMNS)].to_numpy(dtype=float)
+    inflation = df[INFLATION_COLUMN].to_numpy(dtype=float)
+    returns.flags.writeable = False
+    inflation.flags.writeable = False
+    return df["Year"].to_numpy(), returns, inflation
+
+
+def normalize_weights(weights):
+    weights = np.clip(np.asarray(weights, dtype=float), 0, None)
+    total = weights.sum()
+    if total == 0:
+        raise ValueError("Asset allocation must have at least one positive weight")
+    return weights / total
+
+
+def simulate_balances(contribution, weights, years, n_paths, seed=None, real=True, path=HISTORIC_PATH):
+    # Returns the (n_paths x years) end-of-year balances
+    _, returns, inflation = load_historic(path)
+    # Portfolio growth of each historical year, then one gather for all sampled years
+    yearly_growth = 1.0 + returns @ normalize_weights(weights)
+    if real:
+        yearly_growth /= 1.0 + inflation
+    rng = np.random.default_rng(seed)
+    sampled = rng.integers(0, len(yearly_growth), size=(n_paths, years))
+    cumulative = np.cumprod(yearly_growth[sampled], axis=1)
+    previous = np.empty_like(cumulative)
+    previous[:, 0] = 1.0
+    previous[:, 1:] = cumulative[:, :-1]
+    return contribution * cumulative * np.cumsum(1.0 / previous, axis=1)
+
+
+def percentile_bands(balances):
+    return np.percentile(balances, PERCENTILES, axis=0)
+
+
+def _attach(name, shape):
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+
+
+def _simulate_chunk(args):
+    name, shape, start, stop, contribution, weights, seed, real, path = args
+    block, balances = _attach(name, shape)
+    try:
+        balances[start:stop] = simulate_balances(contribution, weights, shape[1], stop - start, seed, real, path)
+    finally:
+        del balances
+        block.close()
+
+
+def _bands_chunk(args):
+    name, shape, start, stop = args
+    block, balances = _attach(name, shape)
+    try:
+        return percentile_bands(balances[:, start:stop])
+    finally:
+        del balances
+        block.close()
+
+
+def _split(total, parts):
+    bounds = np.linspace(0, total, parts + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+_pool = None
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=SIMULATION_WORKERS)
+    return _pool
+
+
+def simulate(contribution, weights, years=30, n_paths=20_000, seed=None, real=True, workers=None,
+             path=HISTORIC_PATH, progress=None):
+    # Percentile bands of the projected balance: {"years": [1..years], "bands": {p: [...]}, ...}
+    # progress, if given, is called with the finished fraction after each chunk of paths.
+    workers = SIMULATION_WORKERS if workers is None else workers
+    seeds = np.random.SeedSequence(seed)
+    n_chunks = min(max(1, -(-n_paths // CHUNK_PATHS)), max(1, workers))
+    if n_chunks == 1:
+        balances = simulate_balances(contribution, weights, years, n_paths, seeds, real, path)
+        bands = percentile_bands(balances)
+        final = balances[:, -1]
+        if progress is not None:
+            progress(1.0)
+    else:
+        shape = (n_paths, years)
+        block = shared_memory.SharedMemory(create=True, size=n_paths * years * 8)
+        try:
+            pool = _get_pool()
+            chunks = pool.map(_simulate_chunk, [
+                (block.name, shape, start, stop, contribution, list(weights), child, real, path)
+                for (start, stop), child in zip(_split(n_paths, n_chunks), seeds.spawn(n_chunks))
+            ])
+            for done, _ in enumerate(chunks, 1):
+                if progress is not None:
+                    progress(done / (n_chunks + 1))
+            bands = np.concatenate(list(pool.map(_bands_chunk, [
+                (block.name, shape, start, stop) for start, stop in _split(years, n_chunks)
+            ])), axis=1)
+            final = np.ndarray(shape, dtype=np.float64, buffer=block.buf)[:, -1].copy()
+            if progress is not None:
+                progress(1.0)
+        finally:
+            block.close()
+            block.unlink()
+
+    return {
+        "years": list(range(1, years + 1)),
+        "bands": {p: band.tolist() for p, band in zip(PERCENTILES, bands)},
+        "paths": n_paths,
+        "contribution": contribution,
+        "prob_positive": float((final > 0).mean())
+    }
@@ -0,0 +1,184 @@
+import json
+import logging
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+# =============================================================================
+# Columnar Snapshot of the data/ Tree
+# =============================================================================
+# `python snapshot.py` parses every source CSV once and writes each column as its own .npy file
+# (dates already datetime64, text as fixed-width unicode) next to an index.json that records the
+# mtime/size of the CSV it came from. Readers memory-map the columns, so a fresh snapshot turns
+# worker start-up into a handful of mmap calls instead of CSV parsing. Any table whose source
+# file has changed since the build is treated as missing and callers fall back to the CSV.
+
+log = logging.getLogger(__name__)
+
+# Root of the CSV tree; DATA_DIR points the whole app (and the benchmarks) at another copy
+DATA_DIR = os.environ.get("DATA_DIR", "data")
+SNAPSHOT_DIR = os.path.join(DATA_DIR, "snapshot")
+INDEX_FILE = "index.json"
+SNAPSHOT_FORMAT = 1
+
+_lock = threading.Lock()
+_state = {"index": None, "index_mtime": None, "arrays": {}}
+
+
+def source_fingerprint(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+# =============================================================================
+# Build
+# =============================================================================
+
+def _column_arrays(series):
+    # Returns (values, null_mask) with values in a dtype np.load can memory-map.
+    if series.dtype.kind in "biufcmM":
+        return series.to_numpy(), None
+    mask = series.isna().to_numpy()
+    values = series.astype(object).where(~mask, "").to_numpy().astype(str)
+    return values, (mask if mask.any() else None)
+
+
+def _write_frame(frame, name, out_dir):
+    columns = []
+    for i, col in enumerate(frame.columns):
+        values, mask = _column_arrays(frame[col])
+        file_name = f"{name}.{i}.npy"
+        np.save(os.path.join(out_dir, file_name), values, allow_pickle=False)
+        column = {"name": col, "file": file_name}
+        if mask is not None:
+            column["null_mask"] = f"{name}.{i}.mask.npy"
+            np.save(os.path.join(out_dir, column["null_mask"]), mask, allow_pickle=False)
+        columns.append(column)
+    return {"rows": len(frame), "columns": columns}
+
+
+def build_snapshot(tables, series=None, snapshot_dir=None):
+    # tables: {csv_path: date_col or None}; series: {name: (source_path, builder)} where builder
+    # turns the source path into a pre-aggregated frame.
+    snapshot_dir = snapshot_dir or SNAPSHOT_DIR
+    tmp_dir = snapshot_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    index = {"format": SNAPSHOT_FORMAT, "tables": {}, "series": {}}
+    for n, (path, date_col) in enumerate(sorted(tables.items())):
+        if not os.path.exists(path):
+            log.warning("skipping missing source: %s", path)
+            continue
+        fingerprint = source_fingerprint(path)
+        df = pd.read_csv(path)
+        if date_col is not None:
+            df[date_col] = pd.to_datetime(df[date_col])
+        entry = _write_frame(df, f"table{n}", tmp_dir)
+        entry["fingerprint"] = fingerprint
+        entry["date_col"] = date_col
+        index["tables"][path] = entry
+
+    for name, (path, builder) in sorted((series or {}).items()):
+        if not os.path.exists(path):
+            log.warning("skipping missing source: %s", path)
+            continue
+        fingerprint = source_fingerprint(path)
+        entry = _write_frame(builder(path), name, tmp_dir)
+        entry["fingerprint"] = fingerprint
+        entry["source"] = path
+        index["series"][name] = entry
+
+    with open(os.path.join(tmp_dir, INDEX_FILE), "w") as f:
+        json.dump(index, f, indent=1)
+
+    shutil.rmtree(snapshot_dir, ignore_errors=True)
+    os.replace(tmp_dir, snapshot_dir)
+    reset()
+    return index
+
+
+# =============================================================================
+# Load
+# =============================================================================
+
+def reset():
+    with _lock:
+        _state["index"] = None
+        _state["index_mtime"] = None
+        _state["arrays"].clear()
+
+
+def _current_index():
+    index_path = os.path.join(SNAPSHOT_DIR, INDEX_FILE)
+    try:
+        mtime = os.stat(index_path).st_mtime_ns
+    except OSError:
+        return None
+    if _state["index_mtime"] != mtime:
+        with open(index_path) as f:
+            index = json.load(f)
+        _state["index"] = index if index.get("format") == SNAPSHOT_FORMAT else None
+        _state["index_mtime"] = mtime
+        _state["arrays"].clear()
+    return _state["index"]
+
+
+def _load_array(file_name):
+    arrays = _state["arrays"]
+    if file_name not in arrays:
+        arrays[file_name] = np.load(os.path.join(SNAPSHOT_DIR, file_name), mmap_mode="r")
+    return arrays[file_name]
+
+
+def _read_entry(entry):
+    columns = {}
+    for column in entry["columns"]:
+        values = _load_array(column["file"])
+        if values.dtype.kind == "U":
+            values = values.astype(object)
+            if "null_mask" in column:
+                values[_load_array(column["null_mask"])] = np.nan
+        columns[column["name"]] = values
+    return pd.DataFrame(columns, copy=False)
+
+
+def _fresh(entry, path):
+    try:
+        return source_fingerprint(path) == entry["fingerprint"]
+    except OSError:
+        return False
+
+
+def load_table(path):
+    # Returns (frame, parsed date column) from the snapshot, or None when there is no fresh copy.
+    with _lock:
+        index = _current_index()
+        if index is None:
+            return None
+        entry = index["tables"].get(path)
+        if entry is None or not _fresh(entry, path):
+            return None
+        return _read_entry(entry), entry["date_col"]
+
+
+def load_series(name, source_path):
+    with _lock:
+        index = _current_index()
+        if index is None:
+            return None
+        entry = index["series"].get(name)
+        if entry is None or entry["source"] != source_path or not _fresh(entry, source_path):
+            return None
+        return _read_entry(entry)
+
+
+if __name__ == "__main__":
+    import county_data
+
+    logging.basicConfig(level=logging.INFO)
+    built = build_snapshot(county_data.snapshot_tables(), county_data.snapshot_series())
+    print(f"wrote {len(built['tables'])} tables and {len(built['series'])} series to {SNAPSHOT_DIR}")
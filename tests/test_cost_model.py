@@ -0,0 +1,12 @@
+import math
+
+from cost_model import NO_DATA_LABEL, format_currency
+
+
+def test_format_currency_matches_format():
+    values = [10889.805, 1.005, 0.125, -5, 999.995, 1234567.891, -0.001]
+    assert format_currency(values) == ["${:,.2f}".format(v) for v in values]
+
+
+def test_format_currency_missing():
+    assert format_currency([math.nan, 1.0]) == [NO_DATA_LABEL, "$1.00"]
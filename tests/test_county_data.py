@@ -0,0 +1,18 @@
+import pandas as pd
+
+import county_data
+
+
+def test_refresh_skips_counties_not_cached(monkeypatch):
+    built = []
+
+    def build_county_data(county, since=None):
+        built.append(county)
+
+    monkeypatch.setattr(county_data, "build_county_data", build_county_data)
+    monkeypatch.setattr(county_data, "load_yearly_rollup", lambda county: None)
+    county_data.county_cache._entries.clear()
+
+    path = county_data.county_sources("LA")["listing"]
+    assert county_data.refresh_county_data({path: pd.Timestamp("2030-01-01")}) == {}
+    assert built == []
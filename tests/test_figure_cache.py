@@ -0,0 +1,53 @@
+import copy
+import pickle
+import time
+
+import plotly.graph_objects as go
+import pytest
+
+from figure_cache import FigureCache, FrozenDict
+
+
+def build():
+    return go.Figure(go.Scatter(x=[1, 2], y=[3.5, 4.25], name="a"))
+
+
+def cached_figure():
+    cache = FigureCache()
+    cache.get_or_build("key", build)
+    return cache.get_or_build("key", build)
+
+
+def test_hit_returns_read_only_figure():
+    figure = cached_figure()
+    assert isinstance(figure, FrozenDict)
+    with pytest.raises(TypeError):
+        figure["layout"] = {}
+
+
+def test_cached_figure_pickles_and_copies():
+    figure = cached_figure()
+    for restored in (pickle.loads(pickle.dumps(figure)), copy.deepcopy(figure)):
+        assert restored == figure
+        assert isinstance(restored, FrozenDict)
+        assert isinstance(restored["data"][0], FrozenDict)
+
+
+def test_cached_figure_through_diskcache_manager(tmp_path):
+    diskcache = pytest.importorskip("diskcache")
+    pytest.importorskip("multiprocess")
+    from jobs import TimedDiskcacheManager
+
+    manager = TimedDiskcacheManager(diskcache.Cache(str(tmp_path)), expire=60)
+    figure = cached_figure()
+
+    def update_compare_graph(metric):
+        return figure, metric
+
+    job = manager.call_job_fn("compare", manager.make_job_fn(update_compare_graph, False), ["share"], {})
+    deadline = time.monotonic() + 30
+    while not manager.result_ready("compare") and time.monotonic() < deadline:
+        time.sleep(0.05)
+    result = manager.get_result("compare", job)
+    assert "background_callback_error" not in result
+    assert list(result) == [figure, "share"]
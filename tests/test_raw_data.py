@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+from raw_data import apply_filter, split_filter_part
+
+
+@pytest.mark.parametrize("clause, expected", [
+    # Case-sensitive operators, as DataTable sends them by default
+    ("{median_income} s> 70000", ("median_income", "gt", 70000.0, False)),
+    ("{median_income} s>= 70000", ("median_income", "ge", 70000.0, False)),
+    ("{median_income} s< 70000", ("median_income", "lt", 70000.0, False)),
+    ("{median_income} s<= 70000", ("median_income", "le", 70000.0, False)),
+    ("{median_income} s!= 70000", ("median_income", "ne", 70000.0, False)),
+    ("{x} s= 5", ("x", "eq", 5.0, False)),
+    ("{title} scontains Foo", ("title", "contains", "Foo", False)),
+    ('{title} s= "Data Analyst"', ("title", "eq", "Data Analyst", False)),
+    # Case-insensitive columns
+    ("{x} icontains a", ("x", "contains", "a", True)),
+    ("{title} i= foo", ("title", "eq", "foo", True)),
+    ("{title} ieq foo", ("title", "eq", "foo", True)),
+    # No prefix: typed queries and datestartswith
+    ("{x} >= 5", ("x", "ge", 5.0, False)),
+    ("{x} ne 5", ("x", "ne", 5.0, False)),
+    ("{observation_date} datestartswith 2020", ("observation_date", "datestartswith", "2020", False)),
+    # Operator text inside the column name or value is not an operator
+    ("{a=b} scontains x<y", ("a=b", "contains", "x<y", False)),
+    ("{Name} contains 'a>=b'", ("Name", "contains", "a>=b", False)),
+    ("s= 5", (None, None, None, False)),
+])
+def test_split_filter_part(clause, expected):
+    assert split_filter_part(clause) == expected
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        "title": ["Data Analyst", "data engineer", "Nurse"],
+        "median_income": [65000.0, 72000.0, 80000.0],
+        "observation_date": pd.to_datetime(["2019-05-01", "2020-01-01", "2020-06-01"])
+    })
+
+
+@pytest.mark.parametrize("query, titles", [
+    ("{median_income} s> 70000", ["data engineer", "Nurse"]),
+    ("{median_income} s= 80000", ["Nurse"]),
+    ("{title} scontains Data", ["Data Analyst"]),
+    ("{title} icontains data", ["Data Analyst", "data engineer"]),
+    ("{title} i= nurse", ["Nurse"]),
+    ("{title} s= nurse", []),
+    ("{observation_date} datestartswith 2020 && {median_income} s< 75000", ["data engineer"]),
+])
+def test_apply_filter(frame, query, titles):
+    assert apply_filter(frame, query)["title"].tolist() == titles
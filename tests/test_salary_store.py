@@ -0,0 +1,21 @@
+import pandas as pd
+
+from salary_store import SalaryStore, salary_store
+
+
+def test_years_outside_table_take_last_year():
+    # The 2023 wage, as the hard-coded salaries fell back to before the wage table
+    assert salary_store.salary("Data Analyst", 2019) == 100000.0
+    assert salary_store.salary("Data Analyst", 2030) == 100000.0
+    assert salary_store.salary("Data Analyst", 2020) == 82000.0
+
+
+def test_series_interpolates_gaps():
+    frame = pd.DataFrame({
+        "occupation": ["Nurse", "Nurse"],
+        "region": ["US", "US"],
+        "year": [2020, 2022],
+        "annual_wage": [100.0, 120.0]
+    })
+    store = SalaryStore(frame, "US")
+    assert store.series("Nurse", [2019, 2020, 2021, 2022, 2023]).tolist() == [120.0, 100.0, 110.0, 120.0, 120.0]
@@ -1,5 +1,7 @@
 import pandas as pd
 
+import snapshot
+
 # =============================================================================
 # Constants & Helper Functions
 # =============================================================================
@@ -7,6 +9,7 @@ import pandas as pd
 # Mortgage assumptions
 INTEREST_RATE_ANNUAL = 0.0672  # 6.72% annual
 MONTHS = 360  # 30 years
+DOWN_PAYMENT = 0.20
 INTEREST_RATE_MONTHLY = INTEREST_RATE_ANNUAL / 12
 PROPERTY_TAX = 658
 INSURANCE = 66
@@ -22,12 +25,20 @@ KWH_PER_MONTH = 1023
 HEALTHCARE_DIVISOR = 24
 
 
-def monthly_mortgage(listing_price):
-    principal = 0.80 * listing_price
-    r = INTEREST_RATE_MONTHLY
-    n = MONTHS
-    M = principal * (r * (1 + r) ** n) / ((1 + r) ** n - 1)
-    return M + PROPERTY_TAX + INSURANCE
+def annuity_factor(rate_monthly, months):
+    # Monthly payment per dollar of principal: r(1+r)^n / ((1+r)^n - 1)
+    growth = (1 + rate_monthly) ** months
+    return rate_monthly * growth / (growth - 1)
+
+
+# The mortgage assumptions are fixed, so the annuity factor is computed once at import
+MORTGAGE_ANNUITY_FACTOR = annuity_factor(INTEREST_RATE_MONTHLY, MONTHS)
+
+
+def monthly_mortgage(listing_price, annuity=MORTGAGE_ANNUITY_FACTOR, down_payment=DOWN_PAYMENT):
+    # annuity and down_payment broadcast against listing_price for what-if grids
+    principal = (1 - down_payment) * listing_price
+    return principal * annuity + PROPERTY_TAX + INSURANCE
 
 
 def monthly_gas_cost(gas_price):
@@ -43,6 +54,14 @@ def monthly_healthcare_cost(billing_amount):
 
 
 def load_csv(path, date_col="observation_date"):
+    # Prefer the memory-mapped snapshot copy when it was built from the current file
+    cached = snapshot.load_table(path)
+    if cached is not None:
+        df, parsed_col = cached
+        if date_col is not None and parsed_col != date_col:
+            df[date_col] = pd.to_datetime(df[date_col])
+        return df
     df = pd.read_csv(path)
-    df[date_col] = pd.to_datetime(df[date_col])
+    if date_col is not None:
+        df[date_col] = pd.to_datetime(df[date_col])
     return df